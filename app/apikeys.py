@@ -0,0 +1,144 @@
+import asyncio
+import hashlib
+import hmac
+import os
+import secrets
+import time
+from typing import NamedTuple
+from fastapi import Depends, Header, HTTPException, status
+from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import select
+from app.database import ReadSessionLocal
+from app.models import ApiKey
+from app.cache import on_commit
+from app.routes.auth import Principal, SECRET_KEY, get_current_user, token_scopes
+
+# Keys look like "mk_<prefix>_<secret>". The prefix is stored in clear and
+# indexed; the full key is stored as HMAC-SHA256 under a server secret, so
+# checking a key is one dict lookup plus one constant-time compare.
+API_KEY_SECRET = os.getenv("API_KEY_SECRET", SECRET_KEY).encode()
+API_KEY_REFRESH_INTERVAL = float(os.getenv("API_KEY_REFRESH_INTERVAL", "30"))
+KEY_PREFIX = "mk"
+
+def key_hash(key: str):
+    return hmac.new(API_KEY_SECRET, key.encode(), hashlib.sha256).hexdigest()
+
+def generate_key():
+    prefix = secrets.token_hex(4)
+    return prefix, f"{KEY_PREFIX}_{prefix}_{secrets.token_urlsafe(24)}"
+
+def parse_prefix(key: str):
+    parts = key.split("_", 2)
+    if len(parts) != 3 or parts[0] != KEY_PREFIX:
+        return None
+    return parts[1]
+
+class KeyRecord(NamedTuple):
+    id: int
+    key_hash: str
+    owner: str
+    scopes: frozenset
+
+class KeyUsage:
+    __slots__ = ("total", "window", "window_count")
+
+    def __init__(self):
+        self.total = 0
+        self.window = 0
+        self.window_count = 0
+
+    def hit(self, now: float):
+        minute = int(now // 60)
+        if minute != self.window:
+            self.window, self.window_count = minute, 0
+        self.total += 1
+        self.window_count += 1
+
+class ApiKeyStore:
+    # prefix -> KeyRecord for every active key. Reloaded after any commit
+    # that touches api_keys in this process, and at least every
+    # API_KEY_REFRESH_INTERVAL seconds to pick up changes from other workers.
+    def __init__(self):
+        self._keys = {}
+        self._loaded_at = 0.0
+        self._stale = True
+        self._lock = asyncio.Lock()
+        self.usage = {}
+
+    def mark_stale(self, tables):
+        if "api_keys" in tables:
+            self._stale = True
+
+    async def _refresh(self):
+        async with self._lock:
+            if not self._stale and time.monotonic() - self._loaded_at < API_KEY_REFRESH_INTERVAL:
+                return
+            self._stale = False
+            async with ReadSessionLocal() as db:
+                rows = (await db.execute(
+                    select(ApiKey.id, ApiKey.prefix, ApiKey.key_hash, ApiKey.owner, ApiKey.scopes)
+                    .where(ApiKey.revoked == False)
+                )).all()
+            self._keys = {
+                prefix: KeyRecord(id, digest, owner, frozenset((scopes or "").split()))
+                for id, prefix, digest, owner, scopes in rows
+            }
+            self._loaded_at = time.monotonic()
+
+    async def lookup(self, key: str):
+        # Verifies the key without counting usage.
+        if self._stale or time.monotonic() - self._loaded_at >= API_KEY_REFRESH_INTERVAL:
+            await self._refresh()
+        prefix = parse_prefix(key)
+        record = self._keys.get(prefix) if prefix else None
+        if record is None or not hmac.compare_digest(record.key_hash, key_hash(key)):
+            return None
+        return record
+
+    async def authenticate(self, key: str):
+        record = await self.lookup(key)
+        if record is None:
+            return None
+        usage = self.usage.get(record.id)
+        if usage is None:
+            usage = self.usage[record.id] = KeyUsage()
+        usage.hit(time.time())
+        return record
+
+api_keys = ApiKeyStore()
+on_commit(api_keys.mark_stale)
+
+# --- DEPENDENCIES ---
+optional_bearer = OAuth2PasswordBearer(tokenUrl="/auth/token", auto_error=False)
+
+async def get_api_key(x_api_key: str | None = Header(None)):
+    if not x_api_key:
+        return None
+    record = await api_keys.authenticate(x_api_key)
+    if record is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid API key")
+    return Principal(record.owner, "api_key", {"key_id": record.id, "scopes": record.scopes})
+
+async def get_principal(api_key: Principal | None = Depends(get_api_key), token: str | None = Depends(optional_bearer)):
+    # Machine clients send X-API-Key; people send a bearer token.
+    if api_key is not None:
+        return api_key
+    if token is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return await get_current_user(token)
+
+def principal_scopes(principal: Principal):
+    if principal.kind == "api_key":
+        return principal.claims["scopes"]
+    return token_scopes(principal.claims)
+
+def require_scope(scope: str):
+    async def dependency(principal: Principal = Depends(get_principal)):
+        if scope not in principal_scopes(principal):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=f"Missing scope {scope}")
+        return principal
+    return dependency
@@ -0,0 +1,72 @@
+from datetime import date, timedelta
+from sqlalchemy import Integer, cast, func, literal
+
+# --- TIME BUCKETS ---
+# One definition of each bucket per dialect, used both by queries and by
+# the expression indexes in app.migrations, so the two can't drift apart.
+# SQLite buckets are text labels; PostgreSQL uses date_trunc (immutable,
+# hence indexable) and labels are derived from the returned timestamp.
+GRANULARITIES = ("day", "week", "month", "quarter")
+
+def _inline(value):
+    # Rendered into the SQL rather than bound: neither planner matches an
+    # expression index against a parameter placeholder.
+    return literal(value, literal_execute=True)
+
+def bucket(column, granularity: str, dialect: str):
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Unknown granularity {granularity!r}")
+    if dialect == "postgresql":
+        return func.date_trunc(_inline(granularity), column)
+    if granularity == "day":
+        return func.strftime(_inline("%Y-%m-%d"), column)
+    if granularity == "week":
+        # Monday of the week, matching date_trunc('week').
+        return func.strftime(_inline("%Y-%m-%d"), column, _inline("weekday 0"), _inline("-6 days"))
+    if granularity == "month":
+        return func.strftime(_inline("%Y-%m"), column)
+    quarter = (cast(func.strftime(_inline("%m"), column), Integer) + _inline(2)).self_group().op("/")(_inline(3))
+    return func.strftime(_inline("%Y"), column).concat(_inline("-Q")).concat(quarter)
+
+def _start(label: str, granularity: str):
+    if granularity == "quarter":
+        year, quarter = label.split("-Q")
+        return date(int(year), 3 * int(quarter) - 2, 1)
+    if granularity == "month":
+        return date.fromisoformat(label + "-01")
+    return date.fromisoformat(label)
+
+def bucket_label(value, granularity: str):
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value
+    if granularity == "quarter":
+        return f"{value.year:04d}-Q{(value.month + 2) // 3}"
+    if granularity == "month":
+        return value.strftime("%Y-%m")
+    return value.strftime("%Y-%m-%d")
+
+def _step(start: date, granularity: str, count: int = 1):
+    if granularity == "day":
+        return start + timedelta(days=count)
+    if granularity == "week":
+        return start + timedelta(weeks=count)
+    months = start.year * 12 + start.month - 1 + count * (3 if granularity == "quarter" else 1)
+    return date(months // 12, months % 12 + 1, 1)
+
+def next_buckets(last: str, count: int, granularity: str):
+    start = _start(last, granularity)
+    return [bucket_label(_step(start, granularity, i), granularity) for i in range(1, count + 1)]
+
+def fill_gaps(counts: dict, granularity: str):
+    # Every bucket between the first and last label, zero where empty.
+    labels = sorted(label for label in counts if label)
+    if not labels:
+        return {}
+    filled, current, last = {}, _start(labels[0], granularity), _start(labels[-1], granularity)
+    while current <= last:
+        label = bucket_label(current, granularity)
+        filled[label] = counts.get(label, 0)
+        current = _step(current, granularity)
+    return filled
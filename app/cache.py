@@ -0,0 +1,181 @@
+import inspect
+import re
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from sqlalchemy import event
+from app.singleflight import flight
+
+# --- BACKENDS ---
+class CacheBackend:
+    def get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, value, ttl: float, tags=()):
+        raise NotImplementedError
+
+    def invalidate(self, tables):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        raise NotImplementedError
+
+class LRUCache(CacheBackend):
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()  # key -> (expires_at, tags, value)
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def set(self, key, value, ttl: float, tags=()):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, frozenset(tags), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, tables):
+        tables = set(tables)
+        with self._lock:
+            stale = [k for k, (_, tags, _) in self._entries.items() if tags & tables]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+cache: CacheBackend = LRUCache()
+
+def configure_cache(backend: CacheBackend):
+    global cache
+    cache = backend
+
+# --- DECORATOR ---
+def cached(ttl: float, tables):
+    # Caches a crud function by name and arguments, ignoring the session.
+    # Entries expire after `ttl` seconds or as soon as a commit writes to
+    # one of `tables`. Concurrent misses for the same key are coalesced
+    # into a single computation. Works for sync and async functions.
+    def decorator(func):
+        def key_for(args, kwargs):
+            return (func.__name__, args, tuple(sorted(kwargs.items())))
+
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(db, *args, **kwargs):
+                key = key_for(args, kwargs)
+                value = cache.get(key)
+                if value is None:
+                    async def compute():
+                        seen = generation(tables)
+                        result = await func(db, *args, **kwargs)
+                        if generation(tables) == seen:
+                            cache.set(key, result, ttl, tables)
+                        return result
+                    value = await flight.ado(key, compute)
+                return value
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(db, *args, **kwargs):
+            key = key_for(args, kwargs)
+            value = cache.get(key)
+            if value is None:
+                def compute():
+                    seen = generation(tables)
+                    result = func(db, *args, **kwargs)
+                    if generation(tables) == seen:
+                        cache.set(key, result, ttl, tables)
+                    return result
+                value = flight.do(key, compute)
+            return value
+        return wrapper
+    return decorator
+
+# --- WRITE TRACKING ---
+# Tables written on a connection are collected per transaction and
+# broadcast on commit. The engine "commit" event fires just before the
+# DBAPI commit, so the broadcast is repeated once the connection is reused
+# or returned to the pool. Each broadcast also bumps a per-table
+# generation; cached() skips storing a result if a generation it depends
+# on moved while it was computing, so a read that raced a commit is never
+# cached. Only this process is notified; other workers rely on the TTL.
+_WRITE = re.compile(r'^\s*(?:INSERT\s+(?:OR\s+\w+\s+)?INTO|UPDATE|DELETE\s+FROM)\s+"?(\w+)', re.IGNORECASE)
+write_listeners = []
+_generations = {}
+
+def generation(tables):
+    return sum(_generations.get(table, 0) for table in tables)
+
+def on_commit(listener):
+    write_listeners.append(listener)
+    return listener
+
+def _publish(tables):
+    for table in tables:
+        _generations[table] = _generations.get(table, 0) + 1
+    for listener in write_listeners:
+        listener(tables)
+
+def track_writes(engine):
+    @event.listens_for(engine, "after_cursor_execute")
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        match = _WRITE.match(statement)
+        if match:
+            conn.info.setdefault("written_tables", set()).add(match.group(1))
+
+    @event.listens_for(engine, "commit")
+    def _committing(conn):
+        tables = conn.info.pop("written_tables", None)
+        if tables:
+            _publish(tables)
+            conn.info["committed_tables"] = tables
+
+    @event.listens_for(engine, "rollback")
+    def _discard(conn):
+        conn.info.pop("written_tables", None)
+
+    @event.listens_for(engine, "begin")
+    def _committed(conn):
+        tables = conn.info.pop("committed_tables", None)
+        if tables:
+            _publish(tables)
+
+    @event.listens_for(engine, "checkin")
+    def _checked_in(dbapi_connection, connection_record):
+        tables = connection_record.info.pop("committed_tables", None)
+        if tables:
+            _publish(tables)
+
+on_commit(lambda tables: cache.invalidate(tables))
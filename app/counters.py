@@ -0,0 +1,172 @@
+import sys
+from sqlalchemy import text, func, case, select, delete, insert, true, false
+from sqlalchemy.engine import Engine
+from app.models import Employee, Trucker, Document, AggregateCounter
+from app.buckets import bucket, bucket_label
+
+# --- COUNTER DEFINITIONS ---
+# Per table: the columns whose changes move a counter, and the
+# (dim, key, amount) each row contributes. Templates are rendered per
+# dialect against NEW/OLD inside the row triggers.
+COUNTERS = {
+    "employees": (("is_archived", "registration_date"), [
+        ("total", "''", "1"),
+        ("archived", "''", "{is_archived}"),
+        ("active_month", "{month}", "1 - {is_archived}"),
+    ]),
+    "truckers": (("is_archived", "province_of_issue", "company_name"), [
+        ("total", "''", "1"),
+        ("archived", "''", "{is_archived}"),
+        ("province", "coalesce({r}.province_of_issue, '')", "1"),
+        ("company", "coalesce({r}.company_name, 'Independent')", "1"),
+    ]),
+    "documents": (("verified",), [
+        ("total", "''", "1"),
+        ("verified", "''", "{verified}"),
+    ]),
+}
+
+_DIALECT = {
+    "sqlite": {
+        "flag": "coalesce({r}.{c}, 0)",
+        "month": "coalesce(strftime('%Y-%m', {r}.registration_date), '')",
+        "current": "value",
+    },
+    "postgresql": {
+        "flag": "coalesce({r}.{c}::int, 0)",
+        "month": "coalesce(to_char({r}.registration_date, 'YYYY-MM'), '')",
+        "current": "aggregate_counters.value",
+    },
+}
+
+def _upserts(dialect: str, table: str, row: str, sign: str):
+    sql = _DIALECT[dialect]
+    fields = {
+        "r": row,
+        "is_archived": sql["flag"].format(r=row, c="is_archived"),
+        "verified": sql["flag"].format(r=row, c="verified"),
+        "month": sql["month"].format(r=row),
+    }
+    return [
+        f"INSERT INTO aggregate_counters (scope, dim, key, value) "
+        f"VALUES ('{table}', '{dim}', {key.format(**fields)}, {sign}({amount.format(**fields)})) "
+        f"ON CONFLICT (scope, dim, key) DO UPDATE SET value = {sql['current']} + excluded.value;"
+        for dim, key, amount in COUNTERS[table][1]
+    ]
+
+def _sqlite_triggers(table: str):
+    columns = ", ".join(COUNTERS[table][0])
+    body = {
+        "insert": _upserts("sqlite", table, "NEW", "+"),
+        "delete": _upserts("sqlite", table, "OLD", "-"),
+        f"update of {columns}": _upserts("sqlite", table, "OLD", "-") + _upserts("sqlite", table, "NEW", "+"),
+    }
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS {table}_counters_{event.split()[0]} AFTER {event.upper()} ON {table} "
+        f"BEGIN {' '.join(statements)} END"
+        for event, statements in body.items()
+    ]
+
+def _postgresql_triggers(table: str):
+    columns = ", ".join(COUNTERS[table][0])
+    old = " ".join(_upserts("postgresql", table, "OLD", "-"))
+    new = " ".join(_upserts("postgresql", table, "NEW", "+"))
+    return [
+        f"CREATE OR REPLACE FUNCTION {table}_counters() RETURNS trigger AS $$ BEGIN "
+        f"IF TG_OP IN ('UPDATE', 'DELETE') THEN {old} END IF; "
+        f"IF TG_OP IN ('INSERT', 'UPDATE') THEN {new} END IF; "
+        f"RETURN NULL; END $$ LANGUAGE plpgsql",
+        f"DROP TRIGGER IF EXISTS {table}_counters ON {table}",
+        f"CREATE TRIGGER {table}_counters AFTER INSERT OR DELETE OR UPDATE OF {columns} ON {table} "
+        f"FOR EACH ROW EXECUTE FUNCTION {table}_counters()",
+    ]
+
+def trigger_ddl(dialect: str):
+    build = {"sqlite": _sqlite_triggers, "postgresql": _postgresql_triggers}.get(dialect)
+    if build is None:
+        raise RuntimeError(f"Aggregate counters are not supported on {dialect}")
+    return [stmt for table in COUNTERS for stmt in build(table)]
+
+# --- RECONCILE ---
+TOTALS = [
+    ("employees", "archived", Employee, Employee.is_archived),
+    ("truckers", "archived", Trucker, Trucker.is_archived),
+    ("documents", "verified", Document, Document.verified),
+]
+
+def _flag_count_query(model, flag):
+    return select(func.count(), func.count(case((flag == true(), 1)))).select_from(model)
+
+def _group_queries(dialect: str):
+    month = bucket(Employee.registration_date, "month", dialect)
+    company = func.coalesce(Trucker.company_name, "Independent")
+    return [
+        ("employees", "active_month", select(month, func.count()).where(Employee.is_archived == false()).group_by(month)),
+        ("truckers", "province", select(Trucker.province_of_issue, func.count()).group_by(Trucker.province_of_issue)),
+        ("truckers", "company", select(company, func.count()).group_by(company)),
+    ]
+
+def scan_queries(dialect: str):
+    return [_flag_count_query(model, flag) for _, _, model, flag in TOTALS] + [q for _, _, q in _group_queries(dialect)]
+
+def _scan_rows(conn, dialect: str):
+    rows = []
+    for scope, dim, model, flag in TOTALS:
+        total, flagged = conn.execute(_flag_count_query(model, flag)).one()
+        rows.append({"scope": scope, "dim": "total", "key": "", "value": total})
+        rows.append({"scope": scope, "dim": dim, "key": "", "value": flagged})
+    for scope, dim, query in _group_queries(dialect):
+        rows += [
+            {"scope": scope, "dim": dim, "key": bucket_label(k, "month") if dim == "active_month" else k or "", "value": v}
+            for k, v in conn.execute(query).all()
+        ]
+    return rows
+
+def reconcile_counters(engine: Engine):
+    # Rebuild every counter from full scans while holding off writers, so
+    # trigger updates can't interleave between the scan and the rewrite.
+    with engine.begin() as conn:
+        if engine.dialect.name == "sqlite":
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+        elif engine.dialect.name == "postgresql":
+            conn.execute(text("LOCK TABLE employees, truckers, documents IN SHARE MODE"))
+        rows = _scan_rows(conn, engine.dialect.name)
+        conn.execute(delete(AggregateCounter))
+        conn.execute(insert(AggregateCounter), rows)
+    return len(rows)
+
+def install_counters(engine: Engine):
+    with engine.begin() as conn:
+        for stmt in trigger_ddl(engine.dialect.name):
+            conn.execute(text(stmt))
+        populated = conn.execute(select(AggregateCounter.scope).limit(1)).first()
+    if not populated:
+        reconcile_counters(engine)
+
+# --- READS ---
+def counters_query(scope: str, dim: str):
+    return (
+        select(AggregateCounter.key, AggregateCounter.value)
+        .where(AggregateCounter.scope == scope, AggregateCounter.dim == dim, AggregateCounter.value != 0)
+        .order_by(AggregateCounter.key)
+    )
+
+def totals_query():
+    return (
+        select(AggregateCounter.scope, AggregateCounter.dim, AggregateCounter.value)
+        .where(
+            AggregateCounter.scope.in_(COUNTERS),
+            AggregateCounter.dim.in_(("total", "archived", "verified")),
+            AggregateCounter.key == "",
+        )
+    )
+
+if __name__ == "__main__":
+    from app.database import engine
+    from app.migrations import upgrade
+
+    if sys.argv[1:] != ["reconcile"]:
+        sys.exit("usage: python -m app.counters reconcile")
+    upgrade(engine)
+    install_counters(engine)
+    print(f"Rebuilt {reconcile_counters(engine)} counters")
@@ -1,42 +1,64 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import func, case
-from sklearn.linear_model import LinearRegression
-import numpy as np
-from app.models import Employee, Trucker, Document
+from sqlalchemy import false, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import Employee
+from app.counters import counters_query, totals_query
+from app.buckets import bucket, bucket_label, fill_gaps, next_buckets
+from app.cache import cached
+from app.forecast import forecast
+
+async def read_counters(db: AsyncSession, scope: str, dim: str):
+    return dict((await db.execute(counters_query(scope, dim))).all())
+
+def _rate(part, total):
+    return round((part / total) * 100, 2) if total else 0
 
 # --- EMPLOYEE GROWTH ---
-def get_employee_growth(db: Session):
-    results = db.query(
-        func.strftime('%Y-%m', Employee.registration_date).label('month'),
-        func.count(Employee.id).label('count')
-    ).filter(Employee.is_archived == False).group_by('month').all()
-
-    monthly = {r.month: r.count for r in results}
-    avg_growth = sum(monthly.values()) / len(monthly) if monthly else 0
-
-    # Projection with Linear Regression
-    X = np.array(range(len(monthly))).reshape(-1, 1)
-    y = np.array([v for v in monthly.values()])
-    model = LinearRegression()
-    model.fit(X, y)
-    next_month = model.predict([[len(monthly)]])
-    projection = round(next_month[0])
+def growth_query(granularity: str, dialect: str):
+    period = bucket(Employee.registration_date, granularity, dialect)
+    return select(period, func.count()).where(Employee.is_archived == false()).group_by(period)
+
+async def read_growth(db: AsyncSession, granularity: str):
+    # Months come from the aggregate counters; finer or coarser buckets are
+    # grouped on the matching expression index.
+    if granularity == "month":
+        return await read_counters(db, "employees", "active_month")
+    rows = await db.execute(growth_query(granularity, db.bind.dialect.name))
+    return {bucket_label(period, granularity): count for period, count in rows}
+
+@cached(ttl=60, tables=("employees",))
+async def get_employee_growth(db: AsyncSession, horizon: int = 1, granularity: str = "month"):
+    periods = fill_gaps(await read_growth(db, granularity), granularity)
+    avg_growth = sum(periods.values()) / len(periods) if periods else 0
+
+    # Projection with closed-form least squares, clipped at zero since
+    # registration counts can't be negative.
+    labels = list(periods)
+    projected = forecast([periods[p] for p in labels], horizon)
+    points = [
+        {"period": period, "value": round(max(0, v), 2), "lower": round(max(0, lo), 2), "upper": round(max(0, hi), 2)}
+        for period, v, lo, hi in zip(
+            next_buckets(labels[-1], horizon, granularity) if labels else [],
+            projected.value[0], projected.lower[0], projected.upper[0],
+        )
+    ]
 
     return {
-        "monthly_registrations": monthly,
+        "granularity": granularity,
+        "monthly_registrations": periods,
         "average_growth": avg_growth,
-        "projection": projection
+        "projection": max(0, round(projected.value[0][0])),
+        "forecast": points
     }
 
 # --- TRUCKER DISTRIBUTION ---
-def get_trucker_distribution(db: Session):
-    by_province = db.query(Trucker.province_of_issue, func.count(Trucker.id)).group_by(Trucker.province_of_issue).all()
-    by_company = db.query(func.coalesce(Trucker.company_name, 'Independent'), func.count(Trucker.id)) \
-                   .group_by(func.coalesce(Trucker.company_name, 'Independent')).all()
+@cached(ttl=30, tables=("truckers",))
+async def get_trucker_distribution(db: AsyncSession):
+    by_province = await read_counters(db, "truckers", "province")
+    by_company = await read_counters(db, "truckers", "company")
 
-    total = db.query(Trucker).count()
-    percentages = {k: round((v / total) * 100, 2) for k, v in by_company}
-    most_common = max(by_company, key=lambda x: x[1])[0]
+    total = sum(by_company.values())
+    percentages = {k: _rate(v, total) for k, v in by_company.items()}
+    most_common = max(by_company, key=by_company.get) if by_company else ""
 
     trend = "Balanced"
     if percentages.get("Independent", 0) > 40:
@@ -45,51 +67,51 @@ def get_trucker_distribution(db: Session):
         trend = "Company dominance"
 
     return {
-        "by_province": dict(by_province),
-        "by_company": dict(by_company),
+        "by_province": by_province,
+        "by_company": by_company,
         "percentages": percentages,
         "most_common": most_common,
         "trend": trend
     }
 
-# --- BUSINESS IMPACT ---
-def get_business_impact(db: Session):
-    total_employees = db.query(Employee).count()
-    archived_employees = db.query(Employee).filter(Employee.is_archived == True).count()
-    employee_churn_rate = round((archived_employees / total_employees) * 100, 2) if total_employees else 0
-
-    total_truckers = db.query(Trucker).count()
-    archived_truckers = db.query(Trucker).filter(Trucker.is_archived == True).count()
-    trucker_churn_rate = round((archived_truckers / total_truckers) * 100, 2) if total_truckers else 0
-
-    total_docs = db.query(Document).count()
-    verified_docs = db.query(Document).filter(Document.verified == True).count()
-    compliance_rate = round((verified_docs / total_docs) * 100, 2) if total_docs else 0
-
+# --- METRICS SNAPSHOT ---
+async def get_metrics_snapshot(db: AsyncSession):
+    # Served from the trigger-maintained aggregate counters: a handful of
+    # rows read in one statement, independent of fleet size.
+    totals = {(scope, dim): value for scope, dim, value in (await db.execute(totals_query())).all()}
     return {
-        "employee_churn_rate": employee_churn_rate,
-        "trucker_churn_rate": trucker_churn_rate,
-        "document_compliance_rate": compliance_rate
+        "total_employees": totals.get(("employees", "total"), 0),
+        "archived_employees": totals.get(("employees", "archived"), 0),
+        "total_truckers": totals.get(("truckers", "total"), 0),
+        "archived_truckers": totals.get(("truckers", "archived"), 0),
+        "total_documents": totals.get(("documents", "total"), 0),
+        "verified_documents": totals.get(("documents", "verified"), 0),
     }
 
-# --- COMPLIANCE DATA ---
-def get_compliance_data(db: Session):
-    total_employees = db.query(Employee).count()
-    active_employees = db.query(Employee).filter(Employee.is_archived == False).count()
-
-    total_truckers = db.query(Trucker).count()
-    active_truckers = db.query(Trucker).filter(Trucker.is_archived == False).count()
+# --- BUSINESS IMPACT ---
+def business_impact(snapshot: dict):
+    return {
+        "employee_churn_rate": _rate(snapshot["archived_employees"], snapshot["total_employees"]),
+        "trucker_churn_rate": _rate(snapshot["archived_truckers"], snapshot["total_truckers"]),
+        "document_compliance_rate": _rate(snapshot["verified_documents"], snapshot["total_documents"])
+    }
 
-    total_docs = db.query(Document).count()
-    verified_docs = db.query(Document).filter(Document.verified == True).count()
-    unverified = total_docs - verified_docs
+@cached(ttl=10, tables=("employees", "truckers", "documents"))
+async def get_business_impact(db: AsyncSession):
+    return business_impact(await get_metrics_snapshot(db))
 
+# --- COMPLIANCE DATA ---
+def compliance_data(snapshot: dict):
     return {
-        "total_employees": total_employees,
-        "active_employees": active_employees,
-        "total_truckers": total_truckers,
-        "active_truckers": active_truckers,
-        "total_documents": total_docs,
-        "verified_documents": verified_docs,
-        "unverified_documents": unverified
+        "total_employees": snapshot["total_employees"],
+        "active_employees": snapshot["total_employees"] - snapshot["archived_employees"],
+        "total_truckers": snapshot["total_truckers"],
+        "active_truckers": snapshot["total_truckers"] - snapshot["archived_truckers"],
+        "total_documents": snapshot["total_documents"],
+        "verified_documents": snapshot["verified_documents"],
+        "unverified_documents": snapshot["total_documents"] - snapshot["verified_documents"]
     }
+
+@cached(ttl=10, tables=("employees", "truckers", "documents"))
+async def get_compliance_data(db: AsyncSession):
+    return compliance_data(await get_metrics_snapshot(db))
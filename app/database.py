@@ -1,13 +1,89 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
 from dotenv import load_dotenv
+from app.cache import track_writes
+from app.instrumentation import instrument
 
 load_dotenv()
 
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL")
 
+# --- SQLITE PROFILE ---
+# File-backed SQLite runs in WAL mode so readers never wait on the writer.
+# Requests read through a pooled query_only engine and write through a
+# single connection, so in-process writers queue on the pool instead of
+# failing with "database is locked"; busy_timeout covers other processes.
+SQLITE_PRAGMAS = [
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    f"PRAGMA cache_size=-{int(os.getenv('SQLITE_CACHE_KB', '65536'))}",
+    f"PRAGMA mmap_size={int(os.getenv('SQLITE_MMAP_BYTES', str(256 * 1024 * 1024)))}",
+    "PRAGMA temp_store=MEMORY",
+]
+SQLITE_READ_POOL = int(os.getenv("SQLITE_READ_POOL", "8"))
+
+def sqlite_file(url: str):
+    url = make_url(url)
+    return url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:")
+
+def apply_pragmas(engine, query_only: bool = False):
+    pragmas = SQLITE_PRAGMAS + (["PRAGMA query_only=ON"] if query_only else [])
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+SQLITE_PROFILE = sqlite_file(SQLALCHEMY_DATABASE_URL)
+
+# Sync engine: schema setup, counters and CLI tooling.
 engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False} if "sqlite" in SQLALCHEMY_DATABASE_URL else {})
+if SQLITE_PROFILE:
+    apply_pragmas(engine)
+track_writes(engine)
+instrument(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
+
+# Async engine: request handlers.
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+def async_url(url: str):
+    url = make_url(url)
+    return url.set(drivername=ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername))
+
+# Outside the SQLite profile both names refer to the same engine.
+if SQLITE_PROFILE:
+    async_engine = create_async_engine(async_url(SQLALCHEMY_DATABASE_URL), pool_size=1, max_overflow=0, pool_timeout=30)
+    read_engine = create_async_engine(async_url(SQLALCHEMY_DATABASE_URL), pool_size=SQLITE_READ_POOL, max_overflow=0)
+    apply_pragmas(async_engine.sync_engine)
+    apply_pragmas(read_engine.sync_engine, query_only=True)
+    instrument(read_engine.sync_engine)
+else:
+    async_engine = read_engine = create_async_engine(async_url(SQLALCHEMY_DATABASE_URL))
+track_writes(async_engine.sync_engine)
+instrument(async_engine.sync_engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+ReadSessionLocal = async_sessionmaker(read_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+async def get_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def get_read_db():
+    async with ReadSessionLocal() as db:
+        yield db
+
+def conflict_insert(dialect: str, model):
+    # INSERT with on_conflict_do_nothing/on_conflict_do_update, which
+    # PostgreSQL and SQLite both provide under the same API.
+    module = postgresql if dialect == "postgresql" else sqlite
+    return module.insert(model)
@@ -0,0 +1,65 @@
+from typing import NamedTuple
+import numpy as np
+
+# Two-sided 95% Student-t quantiles for 1..30 degrees of freedom; beyond
+# that the normal quantile is close enough.
+_T95 = np.array([
+    12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+    2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+    2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042,
+])
+_Z95 = 1.960
+
+class LinearFit(NamedTuple):
+    slope: np.ndarray
+    intercept: np.ndarray
+    sigma: np.ndarray
+    n: int
+    x_mean: float
+    sxx: float
+
+class Forecast(NamedTuple):
+    value: np.ndarray
+    lower: np.ndarray
+    upper: np.ndarray
+
+def fit_linear(y) -> LinearFit:
+    # Ordinary least squares of y against 0..n-1 for every row of `y` at
+    # once. A 1-D input is treated as a single series.
+    Y = np.atleast_2d(np.asarray(y, dtype=float))
+    n = Y.shape[1]
+    zeros = np.zeros(Y.shape[0])
+    if n == 0:
+        return LinearFit(zeros, zeros, zeros, 0, 0.0, 0.0)
+
+    x = np.arange(n, dtype=float)
+    x_mean = x.mean()
+    sxx = float(((x - x_mean) ** 2).sum())
+    y_mean = Y.mean(axis=1)
+    slope = (Y - y_mean[:, None]) @ (x - x_mean) / sxx if sxx else zeros
+    intercept = y_mean - slope * x_mean
+
+    dof = n - 2
+    if dof > 0:
+        resid = Y - (intercept[:, None] + slope[:, None] * x)
+        sigma = np.sqrt((resid ** 2).sum(axis=1) / dof)
+    else:
+        sigma = zeros
+    return LinearFit(slope, intercept, sigma, n, x_mean, sxx)
+
+def project(fit: LinearFit, horizon: int = 1) -> Forecast:
+    # Point forecasts and 95% prediction intervals for the next `horizon`
+    # steps, shaped (n_series, horizon). With fewer than three points the
+    # residual spread is unknown and the interval collapses to the point.
+    steps = np.arange(fit.n, fit.n + horizon, dtype=float)
+    value = fit.intercept[:, None] + fit.slope[:, None] * steps
+    if fit.n <= 2:
+        return Forecast(value, value.copy(), value.copy())
+
+    dof = fit.n - 2
+    t = _T95[dof - 1] if dof <= len(_T95) else _Z95
+    se = fit.sigma[:, None] * np.sqrt(1 + 1 / fit.n + (steps - fit.x_mean) ** 2 / fit.sxx)
+    return Forecast(value, value - t * se, value + t * se)
+
+def forecast(y, horizon: int = 1) -> Forecast:
+    return project(fit_linear(y), horizon)
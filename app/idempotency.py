@@ -0,0 +1,54 @@
+import json
+import os
+from datetime import datetime, timedelta
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import conflict_insert
+from app.models import IdempotencyKey
+
+# Whole-request idempotency for bulk writes. The first request with a key
+# claims it and stores its response; repeats within the TTL get that
+# response back without the body being read. A claim whose request died
+# can be taken over once it is older than IDEMPOTENCY_LOCK_SECONDS.
+IDEMPOTENCY_TTL = timedelta(hours=float(os.getenv("IDEMPOTENCY_TTL_HOURS", "24")))
+IDEMPOTENCY_LOCK = timedelta(seconds=float(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "600")))
+
+def _claim_statement(dialect: str, key: str, now: datetime):
+    statement = conflict_insert(dialect, IdempotencyKey).values(key=key, created_at=now, expires_at=now + IDEMPOTENCY_TTL)
+    return statement.on_conflict_do_update(
+        index_elements=[IdempotencyKey.key],
+        set_={"created_at": now, "expires_at": now + IDEMPOTENCY_TTL},
+        where=(IdempotencyKey.response.is_(None)) & (IdempotencyKey.created_at < now - IDEMPOTENCY_LOCK),
+    ).returning(IdempotencyKey.key)
+
+async def claim(db: AsyncSession, key: str):
+    # Returns None once the key is ours, or the stored response to replay.
+    now = datetime.utcnow()
+    await db.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at <= now))
+    claimed = await db.scalar(_claim_statement(db.bind.dialect.name, key, now))
+    stored = None if claimed else await db.scalar(select(IdempotencyKey.response).where(IdempotencyKey.key == key))
+    await db.commit()
+    if claimed:
+        return None
+    if stored is None:
+        raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is in progress")
+    return json.loads(stored)
+
+async def idempotent(db: AsyncSession, key: str | None, run):
+    if key is None:
+        return await run()
+    stored = await claim(db, key)
+    if stored is not None:
+        return JSONResponse(stored, headers={"Idempotent-Replayed": "true"})
+    try:
+        result = await run()
+    except BaseException:
+        await db.rollback()
+        await db.execute(delete(IdempotencyKey).where(IdempotencyKey.key == key))
+        await db.commit()
+        raise
+    await db.execute(update(IdempotencyKey).where(IdempotencyKey.key == key).values(response=json.dumps(result)))
+    await db.commit()
+    return result
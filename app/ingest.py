@@ -0,0 +1,211 @@
+import csv
+import json
+import os
+from datetime import datetime, timezone
+from sqlalchemy import insert, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import conflict_insert
+
+# --- ROW VALIDATORS ---
+# Bulk files are checked field by field with plain functions rather than
+# a Pydantic model per row. Each returns the column value and raises
+# ValueError with a short message. MISSING leaves the column out of the
+# row: the model default applies on insert, and an upsert keeps the
+# stored value.
+MISSING = object()
+
+def required_text(value):
+    value = value.strip() if isinstance(value, str) else value
+    if not value or not isinstance(value, str):
+        raise ValueError("required")
+    return value
+
+def optional_text(value):
+    if value is MISSING:
+        return MISSING
+    value = value.strip() if isinstance(value, str) else value
+    if value in (None, ""):
+        return None
+    if not isinstance(value, str):
+        raise ValueError("must be a string")
+    return value
+
+def optional_datetime(value):
+    if value is MISSING or value in (None, ""):
+        return MISSING
+    try:
+        parsed = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ValueError("must be an ISO 8601 datetime")
+    # Columns hold naive UTC; an offset would otherwise be dropped (SQLite)
+    # or rejected (asyncpg).
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+_BOOLEANS = {"true": True, "1": True, "yes": True, "false": False, "0": False, "no": False}
+
+def optional_bool(value):
+    if value is MISSING or value in (None, ""):
+        return MISSING
+    if isinstance(value, bool):
+        return value
+    try:
+        return _BOOLEANS[str(value).strip().lower()]
+    except KeyError:
+        raise ValueError("must be a boolean")
+
+EMPLOYEE_FIELDS = (
+    ("external_id", optional_text),
+    ("name", required_text),
+    ("registration_date", optional_datetime),
+    ("is_archived", optional_bool),
+)
+TRUCKER_FIELDS = (
+    ("external_id", optional_text),
+    ("name", required_text),
+    ("company_name", optional_text),
+    ("province_of_issue", required_text),
+    ("is_archived", optional_bool),
+)
+
+def validate(record, fields):
+    if not isinstance(record, dict):
+        raise ValueError("expected an object")
+    row = {}
+    for name, check in fields:
+        try:
+            value = check(record.get(name, MISSING))
+        except ValueError as exc:
+            raise ValueError(f"{name}: {exc}")
+        if value is not MISSING:
+            row[name] = value
+    return row
+
+# --- PARSING ---
+# The body is consumed as it arrives and split into lines, so only one
+# network chunk plus one partial line is held at a time. CSV fields may
+# not contain newlines.
+async def lines(request):
+    pending = b""
+    async for chunk in request.stream():
+        pending += chunk
+        *complete, pending = pending.split(b"\n")
+        for line in complete:
+            yield line
+    if pending:
+        yield pending
+
+async def records(request):
+    # Yields (line number, record or ValueError).
+    is_csv = request.headers.get("content-type", "").startswith("text/csv")
+    header = None
+    number = 0
+    async for raw in lines(request):
+        number += 1
+        try:
+            # utf-8-sig drops a leading BOM, which would otherwise end up
+            # in the first CSV column name.
+            line = raw.decode("utf-8-sig" if number == 1 else "utf-8").rstrip("\r")
+        except UnicodeDecodeError:
+            yield number, ValueError("invalid encoding")
+            if is_csv and header is None:
+                return  # nothing after an unreadable header can be parsed
+            continue
+        if not line.strip():
+            continue
+        if not is_csv:
+            try:
+                yield number, json.loads(line)
+            except ValueError:
+                yield number, ValueError("invalid JSON")
+            continue
+        values = next(csv.reader([line]))
+        if header is None:
+            header = [name.strip() for name in values]
+        elif len(values) != len(header):
+            yield number, ValueError(f"expected {len(header)} columns, got {len(values)}")
+        else:
+            yield number, dict(zip(header, values))
+
+# --- INGEST ---
+# Rows carrying an external_id are upserted on it, and the update only
+# fires when some column actually differs, so replaying a feed writes
+# nothing. Rows without one are plain inserts. executemany needs uniform
+# parameters, so a chunk is written in groups of rows with the same keys.
+INGEST_CHUNK = int(os.getenv("INGEST_CHUNK", "5000"))
+MAX_REPORTED_ERRORS = 100
+
+def upsert(dialect: str, model, columns):
+    statement = conflict_insert(dialect, model)
+    updated = [column for column in columns if column != "external_id"]
+    return statement.on_conflict_do_update(
+        index_elements=[model.external_id],
+        set_={column: statement.excluded[column] for column in updated},
+        where=or_(*(getattr(model, column).is_distinct_from(statement.excluded[column]) for column in updated)),
+    ).returning(model.external_id)
+
+async def write_chunk(db: AsyncSession, model, rows):
+    # Returns (inserted, updated, unchanged).
+    keys = [row["external_id"] for row in rows if row.get("external_id")]
+    existing = set(await db.scalars(select(model.external_id).where(model.external_id.in_(keys)))) if keys else set()
+    groups = {}
+    for row in rows:
+        groups.setdefault(tuple(sorted(row)), []).append(row)
+
+    inserted = updated = 0
+    for columns, group in groups.items():
+        keyed = [row for row in group if row.get("external_id")]
+        plain = [row for row in group if not row.get("external_id")]
+        if plain:
+            await db.execute(insert(model), plain)
+            inserted += len(plain)
+        if keyed:
+            written = set(await db.scalars(upsert(db.bind.dialect.name, model, columns), keyed))
+            updated += len(written & existing)
+            inserted += len(written - existing)
+    await db.commit()
+    return inserted, updated, len(rows) - inserted - updated
+
+async def ingest(request, db: AsyncSession, model, fields, chunk_size: int = INGEST_CHUNK):
+    # Valid rows are written chunk_size at a time, one transaction per
+    # chunk, so neither memory nor lock time grows with the upload.
+    # Invalid rows are counted and the first few reported.
+    totals = ("inserted", "updated", "unchanged", "rejected")
+    summary = {**dict.fromkeys(totals, 0), "chunks": [], "errors": []}
+    batch, rejected = {}, 0
+
+    def reject(number, error):
+        nonlocal rejected
+        rejected += 1
+        if len(summary["errors"]) < MAX_REPORTED_ERRORS:
+            summary["errors"].append({"line": number, "error": error})
+
+    async def flush():
+        nonlocal batch, rejected
+        inserted, updated, unchanged = await write_chunk(db, model, [row for _, row in batch.values()]) if batch else (0, 0, 0)
+        chunk = {"chunk": len(summary["chunks"]) + 1, "inserted": inserted, "updated": updated, "unchanged": unchanged, "rejected": rejected}
+        for total in totals:
+            summary[total] += chunk[total]
+        summary["chunks"].append(chunk)
+        batch, rejected = {}, 0
+
+    # Keyed rows are held by external_id: a repeat within the chunk
+    # replaces the earlier row, which is reported as rejected.
+    async for number, record in records(request):
+        try:
+            if isinstance(record, ValueError):
+                raise record
+            row = validate(record, fields)
+        except ValueError as exc:
+            reject(number, str(exc))
+        else:
+            key = ("key", row["external_id"]) if row.get("external_id") else ("line", number)
+            if key in batch:
+                reject(batch[key][0], f"duplicate external_id, superseded by line {number}")
+            batch[key] = (number, row)
+        if len(batch) + rejected >= chunk_size:
+            await flush()
+    if batch or rejected:
+        await flush()
+    return summary
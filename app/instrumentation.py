@@ -0,0 +1,142 @@
+import logging
+import os
+import threading
+import time
+from contextvars import ContextVar
+from sqlalchemy import event
+
+logger = logging.getLogger("app.queries")
+
+QUERY_BUDGET = int(os.getenv("QUERY_BUDGET", "0"))  # 0 disables the budget warning
+
+# --- PER-REQUEST STATS ---
+class QueryStats:
+    __slots__ = ("count", "db_time", "slowest", "slowest_statement")
+
+    def __init__(self):
+        self.count = 0
+        self.db_time = 0.0
+        self.slowest = 0.0
+        self.slowest_statement = None
+
+    def record(self, elapsed: float, statement: str):
+        self.count += 1
+        self.db_time += elapsed
+        if elapsed > self.slowest:
+            self.slowest = elapsed
+            self.slowest_statement = statement
+
+request_stats: ContextVar = ContextVar("request_stats", default=None)
+
+def instrument(engine):
+    # Times every cursor execution and charges it to the request whose
+    # context issued it. Context propagates into the threadpool and into
+    # SQLAlchemy's async greenlets, so sync and async sessions are covered.
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _stop(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        stats = request_stats.get()
+        if stats is not None:
+            stats.record(elapsed, statement)
+
+    # after_cursor_execute doesn't fire for a statement that raises, so the
+    # failed one is popped here instead of staying on the pooled connection.
+    @event.listens_for(engine, "handle_error")
+    def _failed(context):
+        starts = context.connection.info.get("query_start") if context.connection is not None else None
+        if context.execution_context is None or not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        stats = request_stats.get()
+        if stats is not None:
+            stats.record(elapsed, context.statement)
+
+# --- PER-ROUTE AGGREGATES ---
+class RouteStats:
+    __slots__ = ("requests", "queries", "db_time", "max_queries", "slowest", "slowest_statement")
+
+    def __init__(self):
+        self.requests = self.queries = self.max_queries = 0
+        self.db_time = self.slowest = 0.0
+        self.slowest_statement = None
+
+_routes = {}
+_routes_lock = threading.Lock()
+
+def _aggregate(route: str, stats: QueryStats):
+    with _routes_lock:
+        agg = _routes.get(route)
+        if agg is None:
+            agg = _routes[route] = RouteStats()
+        agg.requests += 1
+        agg.queries += stats.count
+        agg.db_time += stats.db_time
+        agg.max_queries = max(agg.max_queries, stats.count)
+        if stats.slowest > agg.slowest:
+            agg.slowest = stats.slowest
+            agg.slowest_statement = stats.slowest_statement
+
+def route_stats():
+    with _routes_lock:
+        return {
+            route: {
+                "requests": agg.requests,
+                "queries": agg.queries,
+                "avg_queries": round(agg.queries / agg.requests, 2),
+                "max_queries": agg.max_queries,
+                "db_time_ms": round(agg.db_time * 1000, 3),
+                "avg_db_time_ms": round(agg.db_time * 1000 / agg.requests, 3),
+                "slowest_ms": round(agg.slowest * 1000, 3),
+                "slowest_statement": agg.slowest_statement,
+            }
+            for route, agg in sorted(_routes.items())
+        }
+
+def reset_route_stats():
+    with _routes_lock:
+        _routes.clear()
+
+def route_name(scope) -> str:
+    route = scope.get("route")
+    return f"{scope['method']} {route.path}" if route is not None else f"{scope['method']} <unmatched>"
+
+# --- MIDDLEWARE ---
+class QueryTimingMiddleware:
+    # Adds X-Query-Count and Server-Timing headers to every response and
+    # folds the request's numbers into the per-route aggregates.
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = QueryStats()
+        token = request_stats.set(stats)
+        started = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                total = (time.perf_counter() - started) * 1000
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (b"x-query-count", str(stats.count).encode()),
+                    (b"server-timing", f'db;dur={stats.db_time * 1000:.3f};desc="{stats.count} queries", app;dur={total:.3f}'.encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            request_stats.reset(token)
+            route = route_name(scope)
+            _aggregate(route, stats)
+            if QUERY_BUDGET and stats.count > QUERY_BUDGET:
+                logger.warning(
+                    "%s issued %d queries (budget %d, %.1f ms in DB); slowest: %s",
+                    route, stats.count, QUERY_BUDGET, stats.db_time * 1000, stats.slowest_statement,
+                )
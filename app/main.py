@@ -1,15 +1,54 @@
+import asyncio
 from fastapi import FastAPI
-from app.routes import auth, analytics, documents
-from app.database import engine, Base
+from fastapi.responses import PlainTextResponse
+from app.routes import auth, api_keys, users, analytics, employees, truckers, documents, admin
+from app.database import engine
+from app.counters import install_counters
+from app.migrations import upgrade
+from app.instrumentation import QueryTimingMiddleware
+from app.telemetry import MetricsMiddleware, flush_metrics_forever, merged_state, render
+from app.revocation import load_revocations, sync_revocations_forever
+from app.ratelimit import RateLimitMiddleware
+from app.passwords import shutdown_hash_processes
 
-Base.metadata.create_all(bind=engine)
+upgrade(engine)
+install_counters(engine)
 
 app = FastAPI()
+app.add_middleware(QueryTimingMiddleware)
+app.add_middleware(RateLimitMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(auth.router)
+app.include_router(api_keys.router)
+app.include_router(users.router)
 app.include_router(analytics.router)
+app.include_router(employees.router)
+app.include_router(truckers.router)
 app.include_router(documents.router)
+app.include_router(admin.router)
+
+background_tasks = set()
+
+@app.on_event("startup")
+async def start_background_tasks():
+    await load_revocations()
+    background_tasks.add(asyncio.create_task(sync_revocations_forever()))
+    background_tasks.add(asyncio.create_task(flush_metrics_forever()))
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    await documents.document_writes.drain()
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    background_tasks.clear()
+    shutdown_hash_processes()
 
 @app.get("/")
 def read_root():
     return {"message": "IoT Analytics Backend Running!"}
+
+@app.get("/metrics", include_in_schema=False)
+async def read_metrics():
+    return PlainTextResponse(render(await merged_state()), media_type="text/plain; version=0.0.4")
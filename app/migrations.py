@@ -0,0 +1,160 @@
+import re
+import sqlite3
+import sys
+from sqlalchemy import column, inspect, select, text, update
+from sqlalchemy.schema import CreateIndex
+from sqlalchemy.engine import Engine
+from app.database import Base
+from app.models import DEFAULT_USER_SCOPES, User
+from app.counters import scan_queries, counters_query, totals_query
+from app.buckets import GRANULARITIES, bucket
+from app.crud import growth_query
+
+# --- INDEXES ---
+# Column indexes are declared on the models; these are the expression and
+# partial indexes that need dialect-specific DDL. Bucket expressions are
+# rendered from app.buckets, so they match the growth queries exactly, and
+# the raw columns are carried along so the grouping is answered from the
+# index.
+def expression_indexes(dialect):
+    ddl = []
+    for granularity in GRANULARITIES:
+        expression = bucket(column("registration_date"), granularity, dialect.name)
+        expression = expression.compile(dialect=dialect, compile_kwargs={"literal_binds": True})
+        name = f"ix_employees_active_{granularity}"
+        if dialect.name == "postgresql":
+            ddl.append(
+                f"CREATE INDEX IF NOT EXISTS {name} ON employees ({expression}) "
+                "INCLUDE (registration_date, is_archived) WHERE is_archived = false"
+            )
+        elif dialect.name == "sqlite":
+            ddl.append(
+                f"CREATE INDEX IF NOT EXISTS {name} "
+                f"ON employees ({expression}, registration_date, is_archived) WHERE is_archived = 0"
+            )
+    return ddl
+
+# --- COLUMNS ---
+# Columns added after a table first shipped; create_all won't add them to
+# an existing table.
+ADDED_COLUMNS = {
+    "documents": [("version", "INTEGER NOT NULL DEFAULT 1")],
+    "employees": [("external_id", "VARCHAR")],
+    "truckers": [("external_id", "VARCHAR")],
+    "users": [("scopes", f"VARCHAR NOT NULL DEFAULT '{DEFAULT_USER_SCOPES}'")],
+}
+
+# Arbitrary key for the PostgreSQL advisory lock held during upgrade().
+UPGRADE_LOCK = 4_212_001
+
+def upgrade(engine: Engine):
+    # Idempotent: creates missing tables and brings existing ones up to the
+    # current columns and index set. Runs at import in every worker, so the
+    # schema is locked before it is inspected and concurrent workers apply
+    # it one at a time.
+    with engine.begin() as conn:
+        if engine.dialect.name == "sqlite":
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+        elif engine.dialect.name == "postgresql":
+            conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": UPGRADE_LOCK})
+        Base.metadata.create_all(bind=conn)
+        for table, columns in ADDED_COLUMNS.items():
+            existing = {column["name"] for column in inspect(conn).get_columns(table)}
+            for name, ddl in columns:
+                if name not in existing:
+                    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {ddl}"))
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                conn.execute(CreateIndex(index, if_not_exists=True))
+        for ddl in expression_indexes(engine.dialect):
+            conn.execute(text(ddl))
+        if engine.dialect.name == "sqlite":
+            # Without statistics SQLite prefers ix_employees_is_archived over
+            # the covering bucket indexes. analysis_limit keeps this quick.
+            conn.exec_driver_sql("PRAGMA analysis_limit=1000")
+            conn.exec_driver_sql("ANALYZE")
+
+# --- PLAN CHECK ---
+HOT_TABLES = ("employees", "truckers", "documents", "aggregate_counters")
+
+def hot_queries(dialect: str):
+    growth = [growth_query(granularity, dialect) for granularity in GRANULARITIES if granularity != "month"]
+    return scan_queries(dialect) + growth + [counters_query("truckers", "company"), totals_query()]
+
+def _sqlite_scans(conn, sql: str):
+    # Plans are taken against an empty copy of the live schema: without
+    # ANALYZE statistics the planner uses an index whenever one applies,
+    # whereas on a small analyzed database a scan can legitimately win.
+    probe = sqlite3.connect(":memory:")
+    try:
+        for (ddl,) in conn.exec_driver_sql(
+            "SELECT sql FROM sqlite_master WHERE type IN ('table', 'index') "
+            "AND sql IS NOT NULL AND name NOT LIKE 'sqlite_%' ORDER BY type DESC"
+        ):
+            probe.execute(ddl)
+        plan = probe.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+    finally:
+        probe.close()
+    return [
+        row[3] for row in plan
+        if re.fullmatch(r"SCAN (\w+)", row[3]) and row[3].split()[1] in HOT_TABLES
+    ]
+
+def _postgresql_scans(conn, sql: str):
+    # With sequential scans disabled, a Seq Scan in the plan means no
+    # index could serve the query at all.
+    conn.execute(text("SET LOCAL enable_seqscan = off"))
+    plan = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}").scalar()
+    scans, nodes = [], [plan[0]["Plan"]]
+    while nodes:
+        node = nodes.pop()
+        if node["Node Type"] == "Seq Scan" and node.get("Relation Name") in HOT_TABLES:
+            scans.append(f"Seq Scan on {node['Relation Name']}")
+        nodes.extend(node.get("Plans", []))
+    return scans
+
+def check_plans(engine: Engine):
+    # Returns (sql, offending plan steps) for every hot query that falls
+    # back to a full table scan instead of an index.
+    inspect = {"sqlite": _sqlite_scans, "postgresql": _postgresql_scans}[engine.dialect.name]
+    failures = []
+    with engine.begin() as conn:
+        for query in hot_queries(engine.dialect.name):
+            sql = str(query.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+            scans = inspect(conn, sql)
+            if scans:
+                failures.append((sql, scans))
+    return failures
+
+# --- SCOPES ---
+def grant_scopes(engine: Engine, username: str, scopes):
+    # Returns the user's scopes afterwards, or None if there is no such user.
+    # Tokens already issued keep their old scopes until they expire.
+    with engine.begin() as conn:
+        current = conn.execute(select(User.scopes).where(User.username == username)).scalar()
+        if current is None:
+            return None
+        granted = " ".join(sorted(set(current.split()) | set(scopes)))
+        conn.execute(update(User).where(User.username == username).values(scopes=granted))
+    return granted
+
+if __name__ == "__main__":
+    from app.database import engine
+
+    command = sys.argv[1:2]
+    if command == ["upgrade"]:
+        upgrade(engine)
+        print("Schema up to date")
+    elif command == ["check"]:
+        failures = check_plans(engine)
+        for sql, scans in failures:
+            print(f"{'; '.join(scans)}\n    {' '.join(sql.split())}")
+        sys.exit(1 if failures else 0)
+    elif command == ["grant"] and len(sys.argv) > 3:
+        upgrade(engine)
+        granted = grant_scopes(engine, sys.argv[2], sys.argv[3:])
+        if granted is None:
+            sys.exit(f"No user {sys.argv[2]}")
+        print(f"{sys.argv[2]}: {granted}")
+    else:
+        sys.exit("usage: python -m app.migrations upgrade|check|grant USERNAME SCOPE...")
@@ -1,32 +1,80 @@
 from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, func
 from datetime import datetime
+import os
 from app.database import Base
 
+# Space-separated, like ApiKey.scopes. Anything beyond this is granted with
+# "python -m app.migrations grant".
+DEFAULT_USER_SCOPES = os.getenv("DEFAULT_USER_SCOPES", "records:read")
+
 class User(Base):
     __tablename__ = "users"
     id = Column(Integer, primary_key=True)
     username = Column(String, unique=True)
     hashed_password = Column(String)
+    scopes = Column(String, nullable=False, default=DEFAULT_USER_SCOPES)
 
 class Employee(Base):
     __tablename__ = "employees"
     id = Column(Integer, primary_key=True)
+    external_id = Column(String, nullable=True, unique=True, index=True)
     name = Column(String)
-    registration_date = Column(DateTime, default=datetime.utcnow)
-    is_archived = Column(Boolean, default=False)
+    registration_date = Column(DateTime, default=datetime.utcnow, index=True)
+    is_archived = Column(Boolean, default=False, index=True)
 
 class Trucker(Base):
     __tablename__ = "truckers"
     id = Column(Integer, primary_key=True)
+    external_id = Column(String, nullable=True, unique=True, index=True)
     name = Column(String)
-    company_name = Column(String, nullable=True)
-    province_of_issue = Column(String)
-    is_archived = Column(Boolean, default=False)
+    company_name = Column(String, nullable=True, index=True)
+    province_of_issue = Column(String, index=True)
+    is_archived = Column(Boolean, default=False, index=True)
 
 class Document(Base):
     __tablename__ = "documents"
     id = Column(Integer, primary_key=True)
     title = Column(String)
-    verified = Column(Boolean, default=False)
+    verified = Column(Boolean, default=False, index=True)
     verification_date = Column(DateTime, nullable=True)
     verified_by = Column(String, nullable=True)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+
+class AggregateCounter(Base):
+    __tablename__ = "aggregate_counters"
+    scope = Column(String, primary_key=True)
+    dim = Column(String, primary_key=True)
+    key = Column(String, primary_key=True, default="")
+    value = Column(Integer, nullable=False, default=0)
+
+class RefreshToken(Base):
+    __tablename__ = "refresh_tokens"
+    id = Column(Integer, primary_key=True)
+    token_hash = Column(String, unique=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    expires_at = Column(DateTime)
+    revoked = Column(Boolean, default=False)
+
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+    id = Column(Integer, primary_key=True)
+    jti = Column(String, unique=True)
+    expires_at = Column(DateTime, index=True)
+
+class ApiKey(Base):
+    __tablename__ = "api_keys"
+    id = Column(Integer, primary_key=True)
+    prefix = Column(String, unique=True, index=True)
+    key_hash = Column(String)
+    name = Column(String)
+    owner = Column(String, index=True)
+    scopes = Column(String, default="")
+    created_at = Column(DateTime, default=datetime.utcnow)
+    revoked = Column(Boolean, default=False)
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+    key = Column(String, primary_key=True)
+    response = Column(String, nullable=True)  # JSON; NULL while the request is running
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, index=True)
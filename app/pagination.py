@@ -0,0 +1,67 @@
+import base64
+import json
+from datetime import datetime
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from app.database import ReadSessionLocal
+
+# --- KEYSET PAGINATION ---
+# Pages seek past the last id seen (WHERE id > :last ORDER BY id) instead
+# of using OFFSET, so page N costs the same as page 1. The filter indexes
+# are single-column, and SQLite stores rowid in each entry, so
+# "col = ? AND id > ?" walks one index in id order.
+STREAM_BATCH = 1000
+
+def encode_cursor(last_id: int):
+    return base64.urlsafe_b64encode(json.dumps([last_id]).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str):
+    try:
+        (last_id,) = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return int(last_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+def keyset_query(model, columns, criteria, cursor: str | None):
+    query = select(*columns).where(*criteria).order_by(model.id)
+    if cursor:
+        query = query.where(model.id > decode_cursor(cursor))
+    return query
+
+async def fetch_page(db, model, columns, criteria, cursor: str | None, limit: int):
+    rows = (await db.execute(keyset_query(model, columns, criteria, cursor).limit(limit + 1))).all()
+    items = [dict(row._mapping) for row in rows[:limit]]
+    return {"items": items, "next_cursor": encode_cursor(items[-1]["id"]) if len(rows) > limit else None}
+
+def stream_ndjson(model, columns, criteria, cursor: str | None):
+    # Pages internally by keyset, each batch in its own short session, so
+    # a slow client holds neither a pooled reader nor a WAL snapshot while
+    # it drains the response. Rows changed mid-export may show either
+    # version, but none is skipped or repeated.
+    last_id = decode_cursor(cursor) if cursor else None
+
+    async def lines():
+        nonlocal last_id
+        while True:
+            query = select(*columns).where(*criteria).order_by(model.id).limit(STREAM_BATCH)
+            if last_id is not None:
+                query = query.where(model.id > last_id)
+            async with ReadSessionLocal() as db:
+                rows = (await db.execute(query)).all()
+            if not rows:
+                return
+            last_id = rows[-1].id
+            yield "".join(json.dumps(dict(row._mapping), default=_json_default) + "\n" for row in rows)
+            if len(rows) < STREAM_BATCH:
+                return
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+def wants_ndjson(format: str | None, accept: str | None):
+    return format == "ndjson" or (accept or "").startswith("application/x-ndjson")
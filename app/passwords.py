@@ -0,0 +1,67 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from passlib.context import CryptContext
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+# bcrypt releases the GIL, so a small thread pool verifies in parallel
+# without blocking the event loop. Requests beyond the workers plus the
+# queue limit are rejected instead of piling up behind the pool.
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+HASH_QUEUE_LIMIT = int(os.getenv("HASH_QUEUE_LIMIT", "32"))
+
+class PoolSaturated(Exception):
+    pass
+
+class BoundedPool:
+    def __init__(self, workers: int, queue_limit: int):
+        self.capacity = workers + queue_limit
+        self.pending = 0
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+
+    async def run(self, fn, *args):
+        if self.pending >= self.capacity:
+            raise PoolSaturated()
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self.pending -= 1
+
+hash_pool = BoundedPool(HASH_WORKERS, HASH_QUEUE_LIMIT)
+
+async def verify_password(plain_password, hashed_password):
+    return await hash_pool.run(pwd_context.verify, plain_password, hashed_password)
+
+# --- BULK HASHING ---
+# Provisioning hashes thousands of passwords at once, so it gets its own
+# process pool (started lazily, spawn rather than fork since the server
+# has threads) and never competes with logins for the bounded pool above.
+HASH_PROCESSES = int(os.getenv("HASH_PROCESSES", str(os.cpu_count() or 1)))
+
+_process_pool = None
+
+def _hash_batch(passwords):
+    return [pwd_context.hash(password) for password in passwords]
+
+async def hash_passwords(passwords: list[str]):
+    global _process_pool
+    if not passwords:
+        return []
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(HASH_PROCESSES, mp_context=multiprocessing.get_context("spawn"))
+    size = max(1, min(64, len(passwords) // (HASH_PROCESSES * 4)))
+    loop = asyncio.get_running_loop()
+    batches = await asyncio.gather(*(
+        loop.run_in_executor(_process_pool, _hash_batch, passwords[i:i + size])
+        for i in range(0, len(passwords), size)
+    ))
+    return [hashed for batch in batches for hashed in batch]
+
+def shutdown_hash_processes():
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(cancel_futures=True)
+        _process_pool = None
@@ -0,0 +1,181 @@
+import json
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+import anyio
+from jose import JWTError
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "1") == "1"
+# "memory" (per worker) or "sqlite:////path/to/limits.db" (shared by all
+# workers on the host).
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+
+logger = logging.getLogger("app.ratelimit")
+
+class Policy(NamedTuple):
+    rate: float   # tokens refilled per second
+    burst: int    # bucket capacity
+
+# First match wins; method None matches any method.
+POLICIES = [
+    ("POST", "/auth/token", Policy(rate=10 / 60, burst=5)),
+    ("POST", "/auth/refresh", Policy(rate=30 / 60, burst=10)),
+    ("POST", "/auth/users", Policy(rate=1 / 60, burst=2)),
+    (None, "/analytics/", Policy(rate=20, burst=40)),
+    (None, "/metrics", Policy(rate=5, burst=10)),
+]
+DEFAULT_POLICY = Policy(rate=50, burst=100)
+
+def policy_for(method: str, path: str):
+    for policy_method, prefix, policy in POLICIES:
+        if (policy_method is None or policy_method == method) and path.startswith(prefix):
+            return prefix, policy
+    return "*", DEFAULT_POLICY
+
+# --- BACKENDS ---
+class MemoryBackend:
+    # Buckets live in STRIPES independent tables, each with its own lock
+    # and LRU bound, so concurrent threads rarely contend and idle clients
+    # age out. A bucket is a two-item list: [tokens, last refill time].
+    STRIPES = 64
+
+    def __init__(self, max_keys: int = 100_000):
+        self._per_stripe = max(1, max_keys // self.STRIPES)
+        self._stripes = [(threading.Lock(), OrderedDict()) for _ in range(self.STRIPES)]
+
+    async def take(self, key: str, policy: Policy, now: float):
+        lock, buckets = self._stripes[hash(key) % self.STRIPES]
+        with lock:
+            bucket = buckets.get(key)
+            if bucket is None:
+                bucket = buckets[key] = [float(policy.burst), now]
+                if len(buckets) > self._per_stripe:
+                    buckets.popitem(last=False)
+            else:
+                buckets.move_to_end(key)
+                bucket[0] = min(policy.burst, bucket[0] + (now - bucket[1]) * policy.rate)
+                bucket[1] = now
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return True, bucket[0]
+            return False, bucket[0]
+
+class SQLiteBackend:
+    # Shared buckets for multiple workers on one host. The refill and take
+    # happen in a single upsert, so workers can't race each other. The data
+    # is disposable, hence synchronous=OFF. Calls run in the threadpool so
+    # lock waits never stall the event loop, and fail open if the lock
+    # can't be had. A bucket idle for `idle` seconds is full again, so its
+    # row is pruned.
+    PRUNE_INTERVAL = 60
+    TAKE = """
+        INSERT INTO rate_buckets (key, tokens, updated, allowed) VALUES (:key, :burst - 1, :now, 1)
+        ON CONFLICT (key) DO UPDATE SET
+            tokens = min(:burst, tokens + (:now - updated) * :rate)
+                     - (min(:burst, tokens + (:now - updated) * :rate) >= 1),
+            allowed = min(:burst, tokens + (:now - updated) * :rate) >= 1,
+            updated = :now
+        RETURNING allowed, tokens
+    """
+
+    def __init__(self, path: str, idle: float):
+        self._local = threading.local()
+        self._path = path
+        self._idle = idle
+        self._pruned_at = 0.0
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_buckets "
+                "(key TEXT PRIMARY KEY, tokens REAL, updated REAL, allowed INTEGER)"
+            )
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self._path, timeout=1, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+        return conn
+
+    def _take(self, key: str, policy: Policy, now: float):
+        conn = self._connection()
+        if now - self._pruned_at >= self.PRUNE_INTERVAL:
+            self._pruned_at = now
+            conn.execute("DELETE FROM rate_buckets WHERE updated < ?", (now - self._idle,))
+        allowed, tokens = conn.execute(
+            self.TAKE, {"key": key, "burst": policy.burst, "rate": policy.rate, "now": now}
+        ).fetchone()
+        return bool(allowed), tokens
+
+    async def take(self, key: str, policy: Policy, now: float):
+        try:
+            return await anyio.to_thread.run_sync(self._take, key, policy, now)
+        except sqlite3.OperationalError:
+            logger.warning("Rate limit store unavailable; allowing request", exc_info=True)
+            return True, float(policy.burst)
+
+def make_backend(spec: str):
+    if spec == "memory":
+        return MemoryBackend()
+    if spec.startswith("sqlite:///"):
+        policies = [policy for _, _, policy in POLICIES] + [DEFAULT_POLICY]
+        return SQLiteBackend(spec[len("sqlite:///"):], idle=max(p.burst / p.rate for p in policies))
+    raise ValueError(f"Unknown rate limit backend {spec!r}")
+
+# --- IDENTITY ---
+async def client_identity(scope):
+    # Valid API key, then authenticated user, then client IP. Invalid keys
+    # fall through, so rotating junk keys can't mint fresh buckets.
+    from app.apikeys import api_keys
+    from app.routes.auth import decode_token
+
+    headers = dict(scope.get("headers") or [])
+    api_key = headers.get(b"x-api-key")
+    if api_key:
+        try:
+            record = await api_keys.lookup(api_key.decode())
+        except UnicodeDecodeError:
+            record = None
+        if record is not None:
+            return f"key:{record.id}"
+    authorization = headers.get(b"authorization", b"")
+    if authorization[:7].lower() == b"bearer ":
+        try:
+            return "user:" + decode_token(authorization[7:].decode())["sub"]
+        except (JWTError, KeyError, UnicodeDecodeError):
+            pass
+    client = scope.get("client")
+    return "ip:" + (client[0] if client else "unknown")
+
+# --- MIDDLEWARE ---
+class RateLimitMiddleware:
+    def __init__(self, app, backend=None):
+        self.app = app
+        self.backend = backend or make_backend(RATE_LIMIT_BACKEND)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not RATE_LIMIT_ENABLED:
+            return await self.app(scope, receive, send)
+
+        prefix, policy = policy_for(scope["method"], scope["path"])
+        allowed, tokens = await self.backend.take(f"{prefix}|{await client_identity(scope)}", policy, time.time())
+        if allowed:
+            return await self.app(scope, receive, send)
+
+        retry_after = max(1, math.ceil((1 - tokens) / policy.rate))
+        body = json.dumps({"detail": "Too many requests"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(retry_after).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
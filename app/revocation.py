@@ -0,0 +1,96 @@
+import asyncio
+import hashlib
+import logging
+import os
+from datetime import datetime
+from math import ceil, log
+from sqlalchemy import select, delete
+from app.database import AsyncSessionLocal, ReadSessionLocal
+from app.models import RevokedToken
+
+logger = logging.getLogger("app.revocation")
+
+REVOCATION_CAPACITY = int(os.getenv("REVOCATION_CAPACITY", "100000"))
+REVOCATION_SYNC_INTERVAL = float(os.getenv("REVOCATION_SYNC_INTERVAL", "5"))
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        self.size = max(64, ceil(-capacity * log(error_rate) / log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        # Double hashing: k positions from one 128-bit digest.
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, item: str):
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item: str):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+class RevocationStore:
+    # Revoked access-token ids. The Bloom filter answers the common "not
+    # revoked" case; positives are confirmed against the exact set. Entries
+    # only need to live until the token would have expired anyway.
+    def __init__(self, capacity: int = REVOCATION_CAPACITY):
+        self.capacity = capacity
+        self._exact = {}  # jti -> expires_at
+        self._bloom = BloomFilter(capacity)
+
+    def add(self, jti: str, expires_at: datetime):
+        self._exact[jti] = expires_at
+        self._bloom.add(jti)
+        if len(self._exact) > self.capacity:
+            self._rebuild()
+
+    def _rebuild(self):
+        now = datetime.utcnow()
+        self._exact = {jti: exp for jti, exp in self._exact.items() if exp > now}
+        self.capacity = max(self.capacity, 2 * len(self._exact))
+        self._bloom = BloomFilter(self.capacity)
+        for jti in self._exact:
+            self._bloom.add(jti)
+
+    def __contains__(self, jti: str):
+        return jti in self._bloom and jti in self._exact
+
+    def is_revoked(self, claims: dict):
+        jti = claims.get("jti")
+        return jti is not None and jti in self
+
+    def __len__(self):
+        return len(self._exact)
+
+    async def sync(self, db):
+        # Re-reads every unexpired revocation, including those made by other
+        # workers. Ids can't serve as a cursor: on PostgreSQL they become
+        # visible in commit order, not id order. Access tokens are short
+        # lived, so the unexpired set stays small.
+        rows = await db.execute(
+            select(RevokedToken.jti, RevokedToken.expires_at).where(RevokedToken.expires_at > datetime.utcnow())
+        )
+        for jti, expires_at in rows:
+            if jti not in self._exact:
+                self.add(jti, expires_at)
+
+revocations = RevocationStore()
+
+async def load_revocations():
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(RevokedToken).where(RevokedToken.expires_at <= datetime.utcnow()))
+        await db.commit()
+        await revocations.sync(db)
+
+async def sync_revocations_forever():
+    while True:
+        await asyncio.sleep(REVOCATION_SYNC_INTERVAL)
+        try:
+            async with ReadSessionLocal() as db:
+                await revocations.sync(db)
+        except Exception:
+            logger.exception("Revocation sync failed")
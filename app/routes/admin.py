@@ -0,0 +1,14 @@
+from fastapi import APIRouter, Depends
+from app.apikeys import require_scope
+from app.instrumentation import route_stats, reset_route_stats
+
+router = APIRouter(prefix="/admin", tags=["Admin"], dependencies=[Depends(require_scope("admin"))])
+
+@router.get("/queries")
+async def read_query_stats():
+    return route_stats()
+
+@router.delete("/queries", status_code=204)
+async def clear_query_stats():
+    reset_route_stats()
+    return None
@@ -1,29 +1,34 @@
-from fastapi import APIRouter, Depends
-from app.database import SessionLocal
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_read_db
+from app.apikeys import require_scope
+from app import cache
+from app.singleflight import flight
 from app.crud import get_employee_growth, get_trucker_distribution, get_business_impact, get_compliance_data
 from app.schemas import EmployeeGrowthResponse, TruckerDistributionResponse, BusinessImpactResponse, ComplianceDataResponse
 
 router = APIRouter(prefix="/analytics", tags=["Analytics"])
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 @router.get("/employees/growth", response_model=EmployeeGrowthResponse)
-def read_employee_growth(db: Session = Depends(get_db)):
-    return get_employee_growth(db)
+async def read_employee_growth(
+    horizon: int = Query(1, ge=1, le=24),
+    granularity: str = Query("month", regex="^(day|week|month|quarter)$"),
+    db: AsyncSession = Depends(get_read_db),
+):
+    return await get_employee_growth(db, horizon, granularity)
 
 @router.get("/truckers/distribution", response_model=TruckerDistributionResponse)
-def read_trucker_distribution(db: Session = Depends(get_db)):
-    return get_trucker_distribution(db)
+async def read_trucker_distribution(db: AsyncSession = Depends(get_read_db)):
+    return await get_trucker_distribution(db)
 
 @router.get("/business/impact", response_model=BusinessImpactResponse)
-def read_business_impact(db: Session = Depends(get_db)):
-    return get_business_impact(db)
+async def read_business_impact(db: AsyncSession = Depends(get_read_db)):
+    return await get_business_impact(db)
 
 @router.get("/compliance", response_model=ComplianceDataResponse)
-def read_compliance(db: Session = Depends(get_db)):
-    return get_compliance_data(db)
+async def read_compliance(db: AsyncSession = Depends(get_read_db)):
+    return await get_compliance_data(db)
+
+@router.get("/cache/stats", dependencies=[Depends(require_scope("admin"))])
+async def read_cache_stats():
+    return {**cache.cache.stats(), "singleflight": flight.stats()}
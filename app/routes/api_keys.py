@@ -0,0 +1,50 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_db, get_read_db
+from app.models import ApiKey
+from app.schemas import ApiKeyCreate, ApiKeyCreated
+from app.apikeys import api_keys, generate_key, key_hash
+from app.routes.auth import Principal, get_current_user, token_scopes
+
+router = APIRouter(prefix="/auth/api-keys", tags=["Auth"])
+
+@router.post("", response_model=ApiKeyCreated, status_code=201)
+async def create_api_key(body: ApiKeyCreate, user: Principal = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    # A key can't be given more than its creator holds.
+    missing = set(body.scopes) - token_scopes(user.claims)
+    if missing:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=f"Cannot grant scopes you don't hold: {' '.join(sorted(missing))}")
+    prefix, key = generate_key()
+    record = ApiKey(prefix=prefix, key_hash=key_hash(key), name=body.name, owner=user.subject, scopes=" ".join(sorted(set(body.scopes))))
+    db.add(record)
+    await db.commit()
+    return {"id": record.id, "name": record.name, "prefix": prefix, "scopes": sorted(set(body.scopes)), "key": key}
+
+@router.get("")
+async def list_api_keys(user: Principal = Depends(get_current_user), db: AsyncSession = Depends(get_read_db)):
+    rows = (await db.execute(select(ApiKey).where(ApiKey.owner == user.subject).order_by(ApiKey.id))).scalars().all()
+    keys = []
+    for row in rows:
+        usage = api_keys.usage.get(row.id)
+        keys.append({
+            "id": row.id,
+            "name": row.name,
+            "prefix": row.prefix,
+            "scopes": row.scopes.split() if row.scopes else [],
+            "created_at": row.created_at,
+            "revoked": row.revoked,
+            "requests": usage.total if usage else 0,
+            "requests_this_minute": usage.window_count if usage else 0,
+        })
+    return keys
+
+@router.delete("/{key_id}", status_code=204)
+async def revoke_api_key(key_id: int, user: Principal = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    result = await db.execute(
+        update(ApiKey).where(ApiKey.id == key_id, ApiKey.owner == user.subject).values(revoked=True)
+    )
+    if result.rowcount != 1:
+        raise HTTPException(status_code=404, detail="API key not found")
+    await db.commit()
+    return None
@@ -1,44 +1,208 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from jose import jwt, JWTError
+from jose import jwt, jwk, JWTError
 from datetime import datetime, timedelta
-from app.schemas import Token
-from app.models import User
-from app.database import SessionLocal
-from passlib.context import CryptContext
+from typing import NamedTuple
+from uuid import uuid4
+import hashlib
+import os
+import secrets
+import time
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.schemas import Token, RefreshRequest, RevokeRequest
+from app.models import User, RefreshToken, RevokedToken
+from app.database import conflict_insert, get_db, get_read_db
+from app.cache import LRUCache, on_commit
+from app.passwords import verify_password, PoolSaturated
+from app.revocation import revocations
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
 
-SECRET_KEY = "your-secret-key-here"
-ALGORITHM = "HS256"
+SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here")
+ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "14"))
 
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+# Built once so signing and verifying don't reconstruct the HMAC key.
+SIGNING_KEY = jwk.construct(SECRET_KEY, ALGORITHM)
 
-def get_user(username: str):
-    db = SessionLocal()
-    return db.query(User).filter(User.username == username).first()
+# --- USER CACHE ---
+# Login lookups are served from memory. Unknown usernames are cached too
+# (as False, with a shorter TTL) so credential-stuffing bursts don't
+# reach the database. Any commit touching `users` drops the cache, which
+# covers new accounts and password changes.
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "60"))
+USER_CACHE_NEGATIVE_TTL = float(os.getenv("USER_CACHE_NEGATIVE_TTL", "10"))
 
-def authenticate_user(username: str, password: str):
-    user = get_user(username)
-    if not user or not verify_password(password, user.hashed_password):
+class CachedUser(NamedTuple):
+    id: int
+    username: str
+    hashed_password: str
+    scopes: str
+
+user_cache = LRUCache(maxsize=int(os.getenv("USER_CACHE_SIZE", "10000")))
+on_commit(user_cache.invalidate)
+
+async def get_user(db: AsyncSession, username: str):
+    cached = user_cache.get(username)
+    if cached is not None:
+        return cached or None
+
+    row = (await db.execute(
+        select(User.id, User.username, User.hashed_password, User.scopes).where(User.username == username)
+    )).first()
+    if row is None:
+        user_cache.set(username, False, USER_CACHE_NEGATIVE_TTL, ("users",))
+        return None
+    user = CachedUser(*row)
+    user_cache.set(username, user, USER_CACHE_TTL, ("users",))
+    return user
+
+async def authenticate_user(db: AsyncSession, username: str, password: str):
+    user = await get_user(db, username)
+    if not user or not await verify_password(password, user.hashed_password):
         return False
     return user
 
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=15))
-    to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    to_encode.update({"exp": expire, "jti": uuid4().hex})
+    return jwt.encode(to_encode, SIGNING_KEY, algorithm=ALGORITHM)
+
+# --- TOKEN VERIFICATION ---
+# Verified tokens are remembered until their own `exp`, so repeat requests
+# skip the HMAC and JSON decode. Revocation checks still run on every
+# request; they must be cheap in-memory lookups.
+class Principal(NamedTuple):
+    subject: str
+    kind: str
+    claims: dict
+
+def token_scopes(claims: dict):
+    # Access tokens carry the user's scopes as a space-separated "scope"
+    # claim, read from the users table at login and refresh.
+    return frozenset(claims.get("scope", "").split())
+
+token_cache = LRUCache(maxsize=int(os.getenv("TOKEN_CACHE_SIZE", "10000")))
+revocation_checks = [revocations.is_revoked]
+
+def decode_token(token: str):
+    claims = token_cache.get(token)
+    if claims is None:
+        claims = jwt.decode(token, SIGNING_KEY, algorithms=[ALGORITHM])
+        ttl = claims.get("exp", 0) - time.time()
+        if ttl > 0:
+            token_cache.set(token, claims, ttl)
+    if any(check(claims) for check in revocation_checks):
+        raise JWTError("Token has been revoked")
+    return claims
+
+async def get_current_user(token: str = Depends(oauth2_scheme)):
+    try:
+        claims = decode_token(token)
+    except JWTError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    if not claims.get("sub"):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, headers={"WWW-Authenticate": "Bearer"})
+    return Principal(claims["sub"], "user", claims)
+
+# --- REFRESH TOKENS ---
+# Refresh tokens are opaque random strings; only their SHA-256 is stored,
+# so a refresh is one indexed lookup rather than a bcrypt verify. Each use
+# rotates the token, and presenting an already-rotated token revokes every
+# refresh token of that user.
+def _digest(token: str):
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def issue_refresh_token(db: AsyncSession, user_id: int):
+    token = secrets.token_urlsafe(32)
+    db.add(RefreshToken(
+        token_hash=_digest(token),
+        user_id=user_id,
+        expires_at=datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+    ))
+    return token
+
+def _unauthorized(detail: str):
+    return HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=detail, headers={"WWW-Authenticate": "Bearer"})
 
 @router.post("/token", response_model=Token)
-async def login(form_data: OAuth2PasswordRequestForm = Depends()):
-    user = authenticate_user(form_data.username, form_data.password)
+async def login(
+    form_data: OAuth2PasswordRequestForm = Depends(),
+    read_db: AsyncSession = Depends(get_read_db),
+    db: AsyncSession = Depends(get_db),
+):
+    # The lookup and bcrypt verify run on a reader so the writer connection
+    # is only held for the refresh-token insert.
+    try:
+        user = await authenticate_user(read_db, form_data.username, form_data.password)
+    except PoolSaturated:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many concurrent logins",
+            headers={"Retry-After": "1"},
+        )
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
-    access_token = create_access_token(data={"sub": user.username})
-    return {"access_token": access_token, "token_type": "bearer"}
+    access_token = create_access_token(data={"sub": user.username, "scope": user.scopes})
+    refresh_token = issue_refresh_token(db, user.id)
+    await db.commit()
+    return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token}
+
+@router.post("/refresh", response_model=Token)
+async def refresh(body: RefreshRequest, db: AsyncSession = Depends(get_db)):
+    row = (await db.execute(
+        select(RefreshToken.id, RefreshToken.user_id, RefreshToken.expires_at, RefreshToken.revoked, User.username, User.scopes)
+        .join(User, User.id == RefreshToken.user_id)
+        .where(RefreshToken.token_hash == _digest(body.refresh_token))
+    )).first()
+    if row is None or row.expires_at <= datetime.utcnow():
+        raise _unauthorized("Invalid refresh token")
+
+    # Conditional update so two concurrent refreshes can't both rotate.
+    rotated = await db.execute(
+        update(RefreshToken).where(RefreshToken.id == row.id, RefreshToken.revoked == False).values(revoked=True)
+    )
+    if row.revoked or rotated.rowcount != 1:
+        await db.execute(update(RefreshToken).where(RefreshToken.user_id == row.user_id).values(revoked=True))
+        await db.commit()
+        raise _unauthorized("Refresh token reuse detected")
+
+    refresh_token = issue_refresh_token(db, row.user_id)
+    await db.commit()
+    access_token = create_access_token(data={"sub": row.username, "scope": row.scopes})
+    return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token}
+
+@router.post("/revoke", status_code=204)
+async def revoke(body: RevokeRequest | None = None, user: Principal = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    expires_at = datetime.utcfromtimestamp(user.claims["exp"])
+    if user.claims.get("jti"):
+        # Another worker may have revoked the same token before its next sync.
+        await db.execute(
+            conflict_insert(db.bind.dialect.name, RevokedToken)
+            .values(jti=user.claims["jti"], expires_at=expires_at)
+            .on_conflict_do_nothing(index_elements=[RevokedToken.jti])
+        )
+    if body and body.refresh_token:
+        owner = select(User.id).where(User.username == user.subject).scalar_subquery()
+        await db.execute(
+            update(RefreshToken)
+            .where(RefreshToken.token_hash == _digest(body.refresh_token), RefreshToken.user_id == owner)
+            .values(revoked=True)
+        )
+    await db.commit()
+    if user.claims.get("jti"):
+        revocations.add(user.claims["jti"], expires_at)
+    return None
+
+@router.get("/me")
+async def read_current_user(user: Principal = Depends(get_current_user)):
+    return {"username": user.subject, "scopes": sorted(token_scopes(user.claims)), "expires": user.claims.get("exp")}
@@ -1,30 +1,142 @@
-from fastapi import APIRouter, Depends, HTTPException
-from app.database import SessionLocal
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from sqlalchemy import case, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
+from app.database import get_db, get_read_db
+from app.apikeys import require_scope
+from app.pagination import fetch_page, stream_ndjson, wants_ndjson
+from app.writequeue import WriteQueue
 from app.models import Document
-from app.schemas import DocumentUpdate
+from app.schemas import DocumentUpdate, DocumentBatchUpdate, DocumentBatchResult
 
 router = APIRouter(prefix="/documents", tags=["Documents"])
 
-def get_db():
-    db = SessionLocal()
+BATCH_CHUNK = 500
+
+COLUMNS = (Document.id, Document.title, Document.verified, Document.verification_date, Document.verified_by, Document.version)
+
+@router.get("", dependencies=[Depends(require_scope("records:read"))])
+async def list_documents(
+    verified: bool | None = None,
+    cursor: str | None = None,
+    limit: int = Query(100, ge=1, le=1000),
+    format: str | None = Query(None, regex="^(json|ndjson)$"),
+    accept: str | None = Header(None),
+    db: AsyncSession = Depends(get_read_db),
+):
+    criteria = [] if verified is None else [Document.verified == verified]
+    if wants_ndjson(format, accept):
+        return stream_ndjson(Document, COLUMNS, criteria, cursor)
+    return await fetch_page(db, Document, COLUMNS, criteria, cursor, limit)
+
+def verification_change(data: DocumentUpdate, now: datetime):
+    # The verify/unverify transition as SET values plus the condition under
+    # which a row actually changes: verification_date and verified_by are
+    # only stamped on first verify, and both are cleared on unverify.
+    if data.verified:
+        values = {
+            Document.verified: True,
+            Document.verification_date: func.coalesce(Document.verification_date, now),
+            Document.verified_by: case((Document.verification_date.is_(None), data.verified_by), else_=Document.verified_by),
+        }
+        changed = or_(Document.verified.is_not(True), Document.verification_date.is_(None))
+    else:
+        values = {Document.verified: False, Document.verification_date: None, Document.verified_by: None}
+        changed = or_(Document.verified.is_not(False), Document.verification_date.is_not(None), Document.verified_by.is_not(None))
+    return values, changed
+
+def chunks(items, size=BATCH_CHUNK):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+@router.put("/batch", response_model=DocumentBatchResult, dependencies=[Depends(require_scope("records:write"))])
+async def update_documents(body: DocumentBatchUpdate, db: AsyncSession = Depends(get_db)):
+    if bool(body.items) == (body.update is not None):
+        raise HTTPException(status_code=422, detail="Provide either items or filter with update")
+    now = datetime.utcnow()
+
+    if body.update is not None:
+        criteria = []
+        if body.filter and body.filter.verified is not None:
+            criteria.append(Document.verified == body.filter.verified)
+        if body.filter and body.filter.title_prefix:
+            criteria.append(Document.title.startswith(body.filter.title_prefix, autoescape=True))
+        if not criteria:
+            raise HTTPException(status_code=422, detail="Provide either items or filter with update")
+        values, changed = verification_change(body.update, now)
+        matched = await db.scalar(select(func.count()).select_from(Document).where(*criteria))
+        updated = (await db.execute(
+            update(Document).where(*criteria, changed).values({**values, Document.version: Document.version + 1})
+        )).rowcount
+        await db.commit()
+        return {"updated": updated, "unchanged": matched - updated, "missing": 0}
+
+    # One UPDATE ... WHERE id IN (...) per distinct (verified, verified_by)
+    # pair; the last entry wins if an id is listed twice.
+    latest = {item.id: item for item in body.items}
+    groups = {}
+    for item in latest.values():
+        groups.setdefault((item.verified, item.verified_by), []).append(item.id)
+
+    found = 0
+    for ids in chunks(list(latest)):
+        found += await db.scalar(select(func.count()).select_from(Document).where(Document.id.in_(ids)))
+    updated = 0
+    for (verified, verified_by), ids in groups.items():
+        values, changed = verification_change(DocumentUpdate(verified=verified, verified_by=verified_by), now)
+        for chunk in chunks(ids):
+            updated += (await db.execute(
+                update(Document).where(Document.id.in_(chunk), changed).values({**values, Document.version: Document.version + 1})
+            )).rowcount
+    await db.commit()
+    return {"updated": updated, "unchanged": found - updated, "missing": len(latest) - found}
+
+def parse_if_match(value: str):
+    # ETags are the quoted row version; "*" matches any version.
+    if value.strip() == "*":
+        return None
     try:
-        yield db
-    finally:
-        db.close()
-
-@router.put("/{doc_id}", status_code=204)
-def update_document(doc_id: int, data: DocumentUpdate, db: Session = Depends(get_db)):
-    doc = db.query(Document).get(doc_id)
-    if not doc:
+        return int(value.strip().removeprefix("W/").strip('"'))
+    except ValueError:
+        raise HTTPException(status_code=412, detail="Precondition failed")
+
+async def apply_document_update(db: AsyncSession, doc_id: int, data: DocumentUpdate, expected: int | None):
+    # One conditional UPDATE ... RETURNING: no read-modify-write window, and
+    # the version only moves when the row actually changes.
+    values, changed = verification_change(data, datetime.utcnow())
+    criteria = [Document.id == doc_id]
+    if expected is not None:
+        criteria.append(Document.version == expected)
+    version = await db.scalar(
+        update(Document)
+        .where(*criteria)
+        .values({**values, Document.version: case((changed, Document.version + 1), else_=Document.version)})
+        .returning(Document.version)
+    )
+    if version is None:
+        exists = expected is not None and await db.scalar(select(Document.id).where(Document.id == doc_id))
+        if exists:
+            raise HTTPException(status_code=412, detail="Precondition failed")
         raise HTTPException(status_code=404, detail="Document not found")
+    return version
+
+async def apply_document_updates(db: AsyncSession, items):
+    results = []
+    for doc_id, data, expected in items:
+        try:
+            results.append(await apply_document_update(db, doc_id, data, expected))
+        except HTTPException as exc:
+            results.append(exc)
+    return results
 
-    doc.verified = data.verified
-    if data.verified and not doc.verification_date:
-        doc.verification_date = datetime.utcnow()
-        doc.verified_by = data.verified_by
-    elif not data.verified:
-        doc.verification_date = None
-        doc.verified_by = None
+# Single-item updates are funnelled through one writer so concurrent
+# verifiers share a transaction (and an fsync) instead of fighting over
+# the SQLite write lock.
+document_writes = WriteQueue(apply_document_updates)
 
-    db.commit()
+@router.put("/{doc_id}", status_code=204, dependencies=[Depends(require_scope("records:write"))])
+async def update_document(doc_id: int, data: DocumentUpdate, response: Response, if_match: str | None = Header(None)):
+    expected = parse_if_match(if_match) if if_match is not None else None
+    version = await document_writes.submit((doc_id, data, expected))
+    response.headers["ETag"] = f'"{version}"'
     return None
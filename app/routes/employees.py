@@ -0,0 +1,38 @@
+from fastapi import APIRouter, Depends, Header, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_db, get_read_db
+from app.models import Employee
+from app.apikeys import require_scope
+from app.routes.auth import Principal
+from app.idempotency import idempotent
+from app.pagination import fetch_page, stream_ndjson, wants_ndjson
+from app.ingest import EMPLOYEE_FIELDS, ingest
+
+router = APIRouter(prefix="/employees", tags=["Employees"])
+
+COLUMNS = (Employee.id, Employee.external_id, Employee.name, Employee.registration_date, Employee.is_archived)
+
+@router.get("", dependencies=[Depends(require_scope("records:read"))])
+async def list_employees(
+    archived: bool | None = None,
+    cursor: str | None = None,
+    limit: int = Query(100, ge=1, le=1000),
+    format: str | None = Query(None, regex="^(json|ndjson)$"),
+    accept: str | None = Header(None),
+    db: AsyncSession = Depends(get_read_db),
+):
+    criteria = [] if archived is None else [Employee.is_archived == archived]
+    if wants_ndjson(format, accept):
+        return stream_ndjson(Employee, COLUMNS, criteria, cursor)
+    return await fetch_page(db, Employee, COLUMNS, criteria, cursor, limit)
+
+@router.post("/bulk")
+async def bulk_create_employees(
+    request: Request,
+    idempotency_key: str | None = Header(None),
+    principal: Principal = Depends(require_scope("records:write")),
+    db: AsyncSession = Depends(get_db),
+):
+    # NDJSON by default; send Content-Type: text/csv for CSV with a header row.
+    key = f"{principal.subject}:employees:{idempotency_key}" if idempotency_key else None
+    return await idempotent(db, key, lambda: ingest(request, db, Employee, EMPLOYEE_FIELDS))
@@ -0,0 +1,46 @@
+from fastapi import APIRouter, Depends, Header, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_db, get_read_db
+from app.models import Trucker
+from app.apikeys import require_scope
+from app.routes.auth import Principal
+from app.idempotency import idempotent
+from app.pagination import fetch_page, stream_ndjson, wants_ndjson
+from app.ingest import TRUCKER_FIELDS, ingest
+
+router = APIRouter(prefix="/truckers", tags=["Truckers"])
+
+COLUMNS = (Trucker.id, Trucker.external_id, Trucker.name, Trucker.company_name, Trucker.province_of_issue, Trucker.is_archived)
+
+@router.get("", dependencies=[Depends(require_scope("records:read"))])
+async def list_truckers(
+    archived: bool | None = None,
+    province: str | None = None,
+    company: str | None = None,
+    cursor: str | None = None,
+    limit: int = Query(100, ge=1, le=1000),
+    format: str | None = Query(None, regex="^(json|ndjson)$"),
+    accept: str | None = Header(None),
+    db: AsyncSession = Depends(get_read_db),
+):
+    criteria = []
+    if archived is not None:
+        criteria.append(Trucker.is_archived == archived)
+    if province is not None:
+        criteria.append(Trucker.province_of_issue == province)
+    if company is not None:
+        criteria.append(Trucker.company_name == company)
+    if wants_ndjson(format, accept):
+        return stream_ndjson(Trucker, COLUMNS, criteria, cursor)
+    return await fetch_page(db, Trucker, COLUMNS, criteria, cursor, limit)
+
+@router.post("/bulk")
+async def bulk_create_truckers(
+    request: Request,
+    idempotency_key: str | None = Header(None),
+    principal: Principal = Depends(require_scope("records:write")),
+    db: AsyncSession = Depends(get_db),
+):
+    # NDJSON by default; send Content-Type: text/csv for CSV with a header row.
+    key = f"{principal.subject}:truckers:{idempotency_key}" if idempotency_key else None
+    return await idempotent(db, key, lambda: ingest(request, db, Trucker, TRUCKER_FIELDS))
@@ -0,0 +1,102 @@
+import json
+import os
+from fastapi import APIRouter, Depends, HTTPException, Request
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import conflict_insert, get_db, get_read_db
+from app.models import DEFAULT_USER_SCOPES, User
+from app.schemas import UserCreate
+from app.passwords import hash_passwords
+from app.apikeys import principal_scopes, require_scope
+from app.routes.auth import Principal
+
+router = APIRouter(prefix="/auth/users", tags=["Auth"])
+
+BULK_USERS_MAX = int(os.getenv("BULK_USERS_MAX", "50000"))
+INSERT_BATCH = 1000
+LOOKUP_BATCH = 500
+
+def parse_rows(body: bytes, content_type: str):
+    if content_type.startswith(("application/x-ndjson", "application/jsonl")):
+        return [json.loads(line) for line in body.splitlines() if line.strip()]
+    rows = json.loads(body)
+    if not isinstance(rows, list):
+        raise ValueError("Expected a JSON array")
+    return rows
+
+def insert_users(dialect: str):
+    # Usernames taken between our lookup and the insert are skipped rather
+    # than failing the whole batch; RETURNING tells us which rows landed.
+    return (
+        conflict_insert(dialect, User)
+        .on_conflict_do_nothing(index_elements=[User.username])
+        .returning(User.id, User.username)
+    )
+
+@router.post("")
+async def create_users(
+    request: Request,
+    principal: Principal = Depends(require_scope("users:write")),
+    read_db: AsyncSession = Depends(get_read_db),
+    db: AsyncSession = Depends(get_db),
+):
+    try:
+        rows = parse_rows(await request.body(), request.headers.get("content-type", ""))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid body: {exc}")
+    if len(rows) > BULK_USERS_MAX:
+        raise HTTPException(status_code=413, detail=f"At most {BULK_USERS_MAX} users per request")
+
+    # New accounts get DEFAULT_USER_SCOPES unless given scopes, which can't
+    # exceed the caller's own.
+    allowed = principal_scopes(principal)
+    results = [None] * len(rows)
+    pending = {}
+    for index, row in enumerate(rows):
+        try:
+            user = UserCreate.parse_obj(row)
+        except ValidationError as exc:
+            results[index] = {"index": index, "status": "invalid", "error": exc.errors()[0]["msg"]}
+            continue
+        if user.username in pending:
+            results[index] = {"index": index, "username": user.username, "status": "duplicate"}
+            continue
+        scopes = set(DEFAULT_USER_SCOPES.split() if user.scopes is None else user.scopes)
+        if not scopes <= allowed:
+            error = f"cannot grant scopes you don't hold: {' '.join(sorted(scopes - allowed))}"
+            results[index] = {"index": index, "username": user.username, "status": "invalid", "error": error}
+            continue
+        pending[user.username] = (index, user.password, " ".join(sorted(scopes)))
+
+    # Skip existing accounts before hashing; bcrypt is the expensive part.
+    # Lookups go through a reader so the writer isn't held while hashing.
+    usernames = list(pending)
+    for i in range(0, len(usernames), LOOKUP_BATCH):
+        existing = await read_db.scalars(select(User.username).where(User.username.in_(usernames[i:i + LOOKUP_BATCH])))
+        for username in existing:
+            index = pending.pop(username)[0]
+            results[index] = {"index": index, "username": username, "status": "exists"}
+
+    usernames = list(pending)
+    hashes = await hash_passwords([pending[username][1] for username in usernames])
+    statement = insert_users(db.bind.dialect.name)
+    for i in range(0, len(usernames), INSERT_BATCH):
+        batch = [
+            {"username": username, "hashed_password": hashed, "scopes": pending[username][2]}
+            for username, hashed in zip(usernames[i:i + INSERT_BATCH], hashes[i:i + INSERT_BATCH])
+        ]
+        created = {username: id for id, username in await db.execute(statement, batch)}
+        await db.commit()
+        for row in batch:
+            index = pending[row["username"]][0]
+            if row["username"] in created:
+                results[index] = {"index": index, "username": row["username"], "status": "created", "id": created[row["username"]]}
+            else:
+                results[index] = {"index": index, "username": row["username"], "status": "exists"}
+
+    return {
+        "created": sum(result["status"] == "created" for result in results),
+        "failed": sum(result["status"] != "created" for result in results),
+        "results": results,
+    }
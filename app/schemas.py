@@ -5,15 +5,32 @@ from datetime import datetime
 class UserCreate(BaseModel):
     username: str
     password: str
+    scopes: Optional[List[str]] = None
 
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+class RevokeRequest(BaseModel):
+    refresh_token: Optional[str] = None
+
+class ForecastPoint(BaseModel):
+    period: str
+    value: float
+    lower: float
+    upper: float
 
 class EmployeeGrowthResponse(BaseModel):
+    granularity: str = "month"
+    # Keyed by bucket label; named for the original monthly-only endpoint.
     monthly_registrations: dict
     average_growth: float
     projection: float
+    forecast: List[ForecastPoint] = []
 
 class TruckerDistributionResponse(BaseModel):
     by_province: dict
@@ -39,3 +56,32 @@ class ComplianceDataResponse(BaseModel):
 class DocumentUpdate(BaseModel):
     verified: bool
     verified_by: Optional[str] = None
+
+class DocumentBatchItem(DocumentUpdate):
+    id: int
+
+class DocumentFilter(BaseModel):
+    verified: Optional[bool] = None
+    title_prefix: Optional[str] = None
+
+class DocumentBatchUpdate(BaseModel):
+    # Either explicit items, or one update applied to every filtered row.
+    items: List[DocumentBatchItem] = []
+    filter: Optional[DocumentFilter] = None
+    update: Optional[DocumentUpdate] = None
+
+class DocumentBatchResult(BaseModel):
+    updated: int
+    unchanged: int
+    missing: int
+
+class ApiKeyCreate(BaseModel):
+    name: str
+    scopes: List[str] = []
+
+class ApiKeyCreated(BaseModel):
+    id: int
+    name: str
+    prefix: str
+    scopes: List[str]
+    key: str
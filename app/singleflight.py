@@ -0,0 +1,77 @@
+import asyncio
+import threading
+import weakref
+from concurrent.futures import Future
+
+class SingleFlight:
+    # Deduplicates concurrent calls by key: the first caller (the leader)
+    # runs the computation and every caller that arrives while it is in
+    # flight waits for and shares the leader's result or exception.
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._async_calls = weakref.WeakKeyDictionary()
+        self.leaders = self.coalesced = 0
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = Future()
+                self.leaders += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            return call.result()
+
+        try:
+            result = fn()
+        except BaseException as exc:
+            call.set_exception(exc)
+            raise
+        else:
+            call.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    async def ado(self, key, fn):
+        # Keyed per event loop, since asyncio futures can't be awaited
+        # across loops.
+        calls = self._async_calls.setdefault(asyncio.get_running_loop(), {})
+        call = calls.get(key)
+        while call is not None:
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(call)
+            except asyncio.CancelledError:
+                # fn runs on the leader's own session, so a cancelled leader
+                # can't hand the work off; followers that weren't cancelled
+                # themselves retry, and one becomes the new leader.
+                if not call.cancelled() or asyncio.current_task().cancelling():
+                    raise
+            call = calls.get(key)
+
+        call = calls[key] = asyncio.get_running_loop().create_future()
+        self.leaders += 1
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            call.cancel()
+            raise
+        except BaseException as exc:
+            call.set_exception(exc)
+            call.exception()  # mark retrieved when nobody else is waiting
+            raise
+        else:
+            call.set_result(result)
+            return result
+        finally:
+            del calls[key]
+
+    def stats(self) -> dict:
+        return {"leaders": self.leaders, "coalesced": self.coalesced}
+
+flight = SingleFlight()
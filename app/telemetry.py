@@ -0,0 +1,313 @@
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from bisect import bisect_left
+import anyio.to_thread
+from app.instrumentation import route_name
+
+logger = logging.getLogger("app.telemetry")
+
+# Counters are plain ints and lists updated from the event loop thread
+# only (middleware code never runs in the threadpool), so the hot path
+# takes no locks.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# With several uvicorn workers, set METRICS_MULTIPROC_DIR to a directory
+# shared by them: each worker periodically writes its state there and
+# /metrics merges every worker's file.
+MULTIPROC_DIR = os.getenv("METRICS_MULTIPROC_DIR")
+FLUSH_INTERVAL = 1.0
+
+_latency = {}   # (method, route) -> [bucket counts..., +Inf count, sum]
+_requests = {}  # (method, route, status) -> count
+_in_flight = 0
+
+def observe(method: str, route: str, status: int, elapsed: float):
+    key = (method, route)
+    series = _latency.get(key)
+    if series is None:
+        series = _latency[key] = [0] * (len(BUCKETS) + 1) + [0.0]
+    series[bisect_left(BUCKETS, elapsed)] += 1
+    series[-1] += elapsed
+    key = (method, route, status)
+    _requests[key] = _requests.get(key, 0) + 1
+
+# --- MIDDLEWARE ---
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        global _in_flight
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        _in_flight += 1
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            _in_flight -= 1
+            route = route_name(scope).split(" ", 1)[1]
+            observe(scope["method"], route, status, time.perf_counter() - started)
+
+# --- COLLECTION ---
+def _pool_gauges(name: str, pool):
+    gauges = {}
+    for metric, attr in (("db_pool_size", "size"), ("db_pool_checked_out", "checkedout"), ("db_pool_overflow", "overflow")):
+        if hasattr(pool, attr):
+            # QueuePool reports unused overflow capacity as a negative number.
+            gauges[(metric, (("engine", name),))] = max(0, getattr(pool, attr)())
+    return gauges
+
+def local_state():
+    from app import cache
+    from app.singleflight import flight
+    from app.database import engine, async_engine, read_engine
+    from app.routes.auth import user_cache
+    from app.routes.documents import document_writes
+
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    stats = cache.cache.stats()
+    users = user_cache.stats()
+    writes = document_writes.stats()
+    gauges = {
+        ("http_requests_in_flight", ()): _in_flight,
+        ("threadpool_tokens_borrowed", ()): limiter.borrowed_tokens,
+        ("threadpool_tokens_total", ()): limiter.total_tokens,
+        ("cache_entries", ()): stats.get("size", 0),
+        ("write_queue_pending", ()): writes["pending"],
+        **_pool_gauges("sync", engine.pool),
+        **_pool_gauges("async", async_engine.pool),
+        **({} if read_engine is async_engine else _pool_gauges("read", read_engine.pool)),
+    }
+    counters = {
+        ("cache_hits_total", ()): stats.get("hits", 0),
+        ("cache_misses_total", ()): stats.get("misses", 0),
+        ("cache_evictions_total", ()): stats.get("evictions", 0),
+        ("singleflight_coalesced_total", ()): flight.coalesced,
+        ("user_cache_hits_total", ()): users["hits"],
+        ("user_cache_misses_total", ()): users["misses"],
+        ("write_queue_batches_total", ()): writes["batches"],
+        ("write_queue_items_total", ()): writes["items"],
+        **{("http_requests_total", (("method", m), ("route", r), ("status", str(s)))): n for (m, r, s), n in _requests.items()},
+    }
+    histograms = {(m, r): list(series) for (m, r), series in _latency.items()}
+    return {"pid": os.getpid(), "gauges": gauges, "counters": counters, "histograms": histograms}
+
+def _encode(state):
+    return {
+        "pid": state["pid"],
+        "gauges": [[name, labels, v] for (name, labels), v in state["gauges"].items()],
+        "counters": [[name, labels, v] for (name, labels), v in state["counters"].items()],
+        "histograms": [[m, r, series] for (m, r), series in state["histograms"].items()],
+    }
+
+def _decode(data):
+    def key(name, labels):
+        return name, tuple(tuple(pair) for pair in labels)
+    return {
+        "pid": data["pid"],
+        "gauges": {key(n, l): v for n, l, v in data["gauges"]},
+        "counters": {key(n, l): v for n, l, v in data["counters"]},
+        "histograms": {(m, r): series for m, r, series in data["histograms"]},
+    }
+
+# --- MULTIPROCESS ---
+# Each worker writes "<pid>-<token>.json"; the token keeps a restarted
+# worker that gets a reused pid from overwriting the dead one's totals.
+# Exited workers' counters and histograms are folded into retired.json so
+# totals stay monotonic and the directory doesn't grow with restarts. The
+# lock file orders folding against readers.
+RETIRED_FILE = "retired.json"
+LOCK_FILE = ".lock"
+
+_worker_file = None  # (pid, path)
+
+def _state_path():
+    global _worker_file
+    pid = os.getpid()
+    if _worker_file is None or _worker_file[0] != pid:
+        _worker_file = (pid, os.path.join(MULTIPROC_DIR, f"{pid}-{uuid.uuid4().hex[:12]}.json"))
+    return _worker_file[1]
+
+@contextmanager
+def _locked(mode):
+    with open(os.path.join(MULTIPROC_DIR, LOCK_FILE), "a") as f:
+        fcntl.flock(f, mode)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+def _read(name: str):
+    try:
+        with open(os.path.join(MULTIPROC_DIR, name)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _write(path: str, data):
+    with open(path + ".tmp", "w") as f:
+        json.dump(data, f)
+    os.replace(path + ".tmp", path)
+
+def _pid_of(name: str):
+    try:
+        return int(name.removesuffix(".json").split("-", 1)[0])
+    except ValueError:
+        return None
+
+def _worker_files():
+    return [name for name in os.listdir(MULTIPROC_DIR) if name.endswith(".json") and _pid_of(name) is not None]
+
+def _alive(pid: int):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def _add(merged, state, sections):
+    for section in sections:
+        for key, value in state[section].items():
+            merged[section][key] = merged[section].get(key, 0) + value
+    for key, series in state["histograms"].items():
+        current = merged["histograms"].get(key)
+        merged["histograms"][key] = list(series) if current is None else [a + b for a, b in zip(current, series)]
+
+def _fold_dead_workers():
+    # Folded names are recorded in retired.json before their files are
+    # removed, so a crash in between can't count a worker twice.
+    with _locked(fcntl.LOCK_EX):
+        data = _read(RETIRED_FILE)
+        folded = set(data["folded"]) if data else set()
+        names = _worker_files()
+        leftover = [name for name in names if name in folded]
+        dead = [name for name in names if name not in folded and not _alive(_pid_of(name))]
+        if dead:
+            retired = _decode(data) if data else {"pid": 0, "gauges": {}, "counters": {}, "histograms": {}}
+            for name in dead:
+                state = _read(name)
+                if state is not None:
+                    _add(retired, _decode(state), ("counters",))
+            _write(os.path.join(MULTIPROC_DIR, RETIRED_FILE), {**_encode(retired), "folded": sorted(set(leftover) | set(dead))})
+        for name in leftover + dead:
+            try:
+                os.remove(os.path.join(MULTIPROC_DIR, name))
+            except FileNotFoundError:
+                pass
+
+def _flush(state):
+    _write(_state_path(), _encode(state))
+    _fold_dead_workers()
+
+async def flush_metrics_forever():
+    # Runs on a timer rather than from the request path so idle workers
+    # still export current gauges. File I/O stays off the event loop.
+    if not MULTIPROC_DIR:
+        return
+    try:
+        while True:
+            try:
+                await anyio.to_thread.run_sync(_flush, local_state())
+            except OSError:
+                logger.exception("Metrics flush failed")
+            await asyncio.sleep(FLUSH_INTERVAL)
+    finally:
+        _flush(local_state())
+
+def _merge_files(own):
+    # Gauges of exited workers are dropped; this worker's own file is
+    # replaced by its live state.
+    merged = {"gauges": {}, "counters": {}, "histograms": {}}
+    _add(merged, own, ("gauges", "counters"))
+    own_name = os.path.basename(_state_path())
+    with _locked(fcntl.LOCK_SH):
+        data = _read(RETIRED_FILE)
+        folded = set(data["folded"]) if data else set()
+        if data:
+            _add(merged, _decode(data), ("counters",))
+        for name in _worker_files():
+            if name == own_name or name in folded:
+                continue
+            state = _read(name)
+            if state is None:
+                continue
+            state = _decode(state)
+            _add(merged, state, ("gauges", "counters") if _alive(state["pid"]) else ("counters",))
+    return merged
+
+async def merged_state():
+    if not MULTIPROC_DIR:
+        return local_state()
+    return await anyio.to_thread.run_sync(_merge_files, local_state())
+
+# --- EXPOSITION ---
+HELP = {
+    "http_request_duration_seconds": ("histogram", "Request latency by route"),
+    "http_requests_total": ("counter", "Requests by route and status"),
+    "http_requests_in_flight": ("gauge", "Requests currently being served"),
+    "threadpool_tokens_borrowed": ("gauge", "Threadpool workers in use"),
+    "threadpool_tokens_total": ("gauge", "Threadpool capacity"),
+    "db_pool_size": ("gauge", "Configured connection pool size"),
+    "db_pool_checked_out": ("gauge", "Connections checked out of the pool"),
+    "db_pool_overflow": ("gauge", "Connections opened beyond the pool size"),
+    "cache_entries": ("gauge", "Entries in the analytics cache"),
+    "cache_hits_total": ("counter", "Analytics cache hits"),
+    "cache_misses_total": ("counter", "Analytics cache misses"),
+    "cache_evictions_total": ("counter", "Analytics cache LRU evictions"),
+    "cache_hit_ratio": ("gauge", "Analytics cache hits over lookups"),
+    "singleflight_coalesced_total": ("counter", "Calls served by an in-flight computation"),
+    "user_cache_hits_total": ("counter", "Login user lookups served from memory"),
+    "user_cache_misses_total": ("counter", "Login user lookups that queried the database"),
+    "write_queue_batches_total": ("counter", "Document update batches committed by the write queue"),
+    "write_queue_items_total": ("counter", "Document updates committed by the write queue"),
+    "write_queue_pending": ("gauge", "Document updates waiting for the next batch"),
+}
+
+def _labels(pairs):
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+def render(state) -> str:
+    samples = {}
+    for section in ("gauges", "counters"):
+        for (name, labels), value in state[section].items():
+            samples.setdefault(name, []).append(f"{name}{_labels(labels)} {value}")
+    hits = state["counters"].get(("cache_hits_total", ()), 0)
+    lookups = hits + state["counters"].get(("cache_misses_total", ()), 0)
+    samples["cache_hit_ratio"] = [f"cache_hit_ratio {hits / lookups if lookups else 0.0}"]
+
+    name = "http_request_duration_seconds"
+    for (method, route), series in sorted(state["histograms"].items()):
+        labels = (("method", method), ("route", route))
+        cumulative = 0
+        for bound, count in zip(BUCKETS + ("+Inf",), series):
+            cumulative += count
+            samples.setdefault(name, []).append(f"{name}_bucket{_labels(labels + (('le', bound),))} {cumulative}")
+        samples[name].append(f"{name}_sum{_labels(labels)} {series[-1]}")
+        samples[name].append(f"{name}_count{_labels(labels)} {cumulative}")
+
+    lines = []
+    for metric in sorted(samples):
+        kind, text = HELP.get(metric, ("untyped", metric))
+        lines += [f"# HELP {metric} {text}", f"# TYPE {metric} {kind}", *samples[metric]]
+    return "\n".join(lines) + "\n"
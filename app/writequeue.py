@@ -0,0 +1,95 @@
+import asyncio
+import contextvars
+import os
+from app.database import AsyncSessionLocal
+
+WRITE_BATCH_SIZE = int(os.getenv("WRITE_BATCH_SIZE", "64"))
+WRITE_BATCH_DELAY = float(os.getenv("WRITE_BATCH_DELAY_MS", "2")) / 1000
+
+class WriteQueue:
+    # Group commit: one writer task gathers submitted items for up to
+    # max_delay (or max_batch items), applies them in one session and
+    # commits once. `apply(db, items)` returns one result per item; an
+    # exception instance in that list is raised to that caller only.
+    def __init__(self, apply, max_batch: int = WRITE_BATCH_SIZE, max_delay: float = WRITE_BATCH_DELAY):
+        self.apply = apply
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.batches = 0
+        self.items = 0
+        self._loop = None
+        self._queue = None
+        self._task = None
+        self._closing = False
+
+    async def submit(self, item):
+        if self._closing:
+            return (await self._write([item]))[0]
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._task.done():
+            self._loop, self._queue = loop, asyncio.Queue()
+            # Fresh context, so the writer's queries aren't counted against
+            # whichever request happened to start it.
+            self._task = loop.create_task(self._run(), context=contextvars.Context())
+        future = loop.create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def _write(self, items):
+        async with AsyncSessionLocal() as db:
+            results = await self.apply(db, items)
+            await db.commit()
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+        return results
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            entry = await self._queue.get()
+            if entry is None:
+                return
+            batch = [entry]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_batch:
+                try:
+                    entry = await asyncio.wait_for(self._queue.get(), max(0, deadline - loop.time()))
+                except asyncio.TimeoutError:
+                    break
+                if entry is None:
+                    self._queue.put_nowait(None)
+                    break
+                batch.append(entry)
+            await self._flush(batch)
+
+    async def _flush(self, batch):
+        self.batches += 1
+        self.items += len(batch)
+        try:
+            async with AsyncSessionLocal() as db:
+                results = await self.apply(db, [item for item, _ in batch])
+                await db.commit()
+        except Exception as exc:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    async def drain(self):
+        # Writes already queued are committed; later submissions bypass the
+        # queue and commit on their own.
+        self._closing = True
+        if self._task is not None and not self._task.done():
+            await self._queue.put(None)
+            await self._task
+
+    def stats(self):
+        return {"batches": self.batches, "items": self.items, "pending": self._queue.qsize() if self._queue else 0}
@@ -0,0 +1,62 @@
+import argparse
+import asyncio
+import os
+import sys
+from sqlalchemy import select, func
+
+def seed(args):
+    from app.database import engine
+    from bench.datagen import generate
+
+    rows = generate(engine, args.scale, args.seed)
+    print(f"Seeded {rows} rows per table at scale {args.scale} (seed {args.seed})")
+
+def run(args):
+    # Measure the app, not the limiter, unless explicitly asked to.
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "0")
+    from app.main import app
+    from app.database import engine, async_engine, read_engine
+    from app.models import Employee, Trucker, Document
+    from bench.datagen import BENCH_USER, BENCH_PASSWORD
+    from bench.driver import run as drive
+    from bench.report import summarize, render, save_baseline, load_baseline, compare
+
+    with engine.connect() as conn:
+        sizes = {
+            model.__tablename__: conn.execute(select(func.max(model.id))).scalar() or 0
+            for model in (Employee, Trucker, Document)
+        }
+    results, skipped = asyncio.run(drive(
+        app, list({engine, async_engine.sync_engine, read_engine.sync_engine}), sizes, BENCH_USER, BENCH_PASSWORD,
+        requests=args.requests, concurrency=args.concurrency, warmup=args.warmup, seed=args.seed,
+    ))
+    summary = summarize(results)
+    comparison = compare(summary, load_baseline(args.compare)) if args.compare else None
+    print(render(summary, comparison))
+    for method, path in skipped:
+        print(f"skipped {method} {path}: no request plan")
+    if args.save:
+        meta = {"requests": args.requests, "concurrency": args.concurrency, "sizes": sizes}
+        print(f"Saved baseline to {save_baseline(args.save, summary, meta)}")
+    if comparison and any(c["regression"] for c in comparison.values()):
+        sys.exit(1)
+
+parser = argparse.ArgumentParser(prog="python -m bench", description="Seed synthetic data and benchmark every route in-process.")
+commands = parser.add_subparsers(dest="command", required=True)
+
+seed_parser = commands.add_parser("seed", help="generate a deterministic dataset into DATABASE_URL")
+seed_parser.add_argument("--scale", choices=["10k", "1m", "10m"], default="10k")
+seed_parser.add_argument("--seed", type=int, default=42)
+seed_parser.set_defaults(handler=seed)
+
+run_parser = commands.add_parser("run", help="drive every route and report latency, throughput and query counts")
+run_parser.add_argument("--requests", type=int, default=500, help="measured requests per endpoint")
+run_parser.add_argument("--concurrency", type=int, default=16)
+run_parser.add_argument("--warmup", type=int, default=20, help="unmeasured requests per endpoint")
+run_parser.add_argument("--seed", type=int, default=42)
+run_parser.add_argument("--save", metavar="NAME", help="save results as bench/baselines/NAME.json")
+run_parser.add_argument("--compare", metavar="NAME", help="compare against a saved baseline; exit 1 on regression")
+run_parser.set_defaults(handler=run)
+
+args = parser.parse_args()
+args.handler(args)
@@ -0,0 +1,178 @@
+import asyncio
+import json
+import random
+import time
+from contextlib import asynccontextmanager
+from urllib.parse import urlencode
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from app.pagination import encode_cursor
+from bench.datagen import PROVINCES
+
+# --- ASGI PLUMBING ---
+async def call(app, method: str, path: str, query: str = "", headers=(), body: bytes = b""):
+    # Runs one request through the ASGI app in-process and returns the
+    # status code and body; no sockets or HTTP client are involved.
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in headers],
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+    pending = [{"type": "http.request", "body": body, "more_body": False}]
+    finished = asyncio.Event()
+    status = 500
+    chunks = []
+
+    async def receive():
+        if pending:
+            return pending.pop()
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body"):
+                finished.set()
+
+    await app(scope, receive, send)
+    return status, b"".join(chunks)
+
+@asynccontextmanager
+async def lifespan(app):
+    inbox, outbox = asyncio.Queue(), asyncio.Queue()
+    task = asyncio.create_task(app({"type": "lifespan", "asgi": {"version": "3.0"}}, inbox.get, outbox.put))
+    await inbox.put({"type": "lifespan.startup"})
+    message = await outbox.get()
+    if message["type"] == "lifespan.startup.failed":
+        raise RuntimeError(message.get("message", "startup failed"))
+    try:
+        yield
+    finally:
+        await inbox.put({"type": "lifespan.shutdown"})
+        await outbox.get()
+        await task
+
+# --- QUERY COUNTING ---
+class QueryCounter:
+    def __init__(self, *engines):
+        self.count = 0
+        for engine in engines:
+            event.listen(engine, "before_cursor_execute", self._count)
+
+    def _count(self, *args):
+        self.count += 1
+
+# --- REQUEST PLANS ---
+def request_plans(sizes: dict, username: str, password: str, auth):
+    # Builds a concrete request for routes that need parameters or a body.
+    # GET routes without path parameters are exercised automatically.
+    # Keys that aren't routes ("/truckers?format=ndjson") label extra
+    # variants of a route.
+    def update_document(rng):
+        body = {"verified": rng.random() < 0.85, "verified_by": "bench"}
+        return f"/documents/{rng.randint(1, max(1, sizes['documents']))}", "", \
+            [("content-type", "application/json"), *auth], json.dumps(body).encode()
+
+    def login(rng):
+        return "/auth/token", "", [("content-type", "application/x-www-form-urlencoded")], \
+            urlencode({"username": username, "password": password}).encode()
+
+    def page(path, table):
+        # A keyset page starting at a random row.
+        def plan(rng):
+            cursor = encode_cursor(rng.randint(0, max(1, sizes[table])))
+            return path, urlencode({"cursor": cursor, "limit": 100}), auth, b""
+        return plan
+
+    def export(rng):
+        province = rng.choice(list(PROVINCES))
+        return "/truckers", urlencode({"format": "ndjson", "province": province}), auth, b""
+
+    return {
+        ("PUT", "/documents/{doc_id}"): update_document,
+        ("POST", "/auth/token"): login,
+        ("GET", "/employees?cursor"): page("/employees", "employees"),
+        ("GET", "/truckers?cursor"): page("/truckers", "truckers"),
+        ("GET", "/documents?cursor"): page("/documents", "documents"),
+        ("GET", "/truckers?format=ndjson"): export,
+    }
+
+def endpoints(app, plans: dict, auth=()):
+    found, skipped, routes = [], [], set()
+    for route in app.routes:
+        if not isinstance(route, APIRoute):
+            continue
+        for method in sorted(route.methods):
+            key = (method, route.path)
+            routes.add(key)
+            if key in plans:
+                found.append((key, plans[key]))
+            elif method == "GET" and "{" not in route.path:
+                found.append((key, lambda rng, path=route.path: (path, "", auth, b"")))
+            else:
+                skipped.append(key)
+    found += [(key, plan) for key, plan in plans.items() if key not in routes]
+    return found, skipped
+
+# --- LOAD ---
+async def drive(app, method: str, plan, requests: int, concurrency: int, counter: QueryCounter, seed: int):
+    rng = random.Random(seed)
+    latencies, statuses = [], {}
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            path, query, headers, body = plan(rng)
+            started = time.perf_counter()
+            try:
+                status, _ = await call(app, method, path, query, headers, body)
+            except Exception:
+                status = 599
+            latencies.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    queries_before = counter.count
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return {
+        "latencies": latencies,
+        "statuses": statuses,
+        "elapsed": time.perf_counter() - started,
+        "queries": counter.count - queries_before,
+    }
+
+async def run(app, engines, sizes: dict, username: str, password: str,
+              requests: int = 500, concurrency: int = 16, warmup: int = 20, seed: int = 42):
+    # Drives every discovered endpoint in turn and returns raw samples per
+    # "METHOD /path", plus the routes that had no request plan.
+    counter = QueryCounter(*engines)
+    results = {}
+    async with lifespan(app):
+        # One login up front; GET routes send its token so protected routes
+        # are measured past their 401 path.
+        status, body = await call(
+            app, "POST", "/auth/token", "", [("content-type", "application/x-www-form-urlencoded")],
+            urlencode({"username": username, "password": password}).encode(),
+        )
+        auth = [("authorization", f"Bearer {json.loads(body)['access_token']}")] if status == 200 else []
+        found, skipped = endpoints(app, request_plans(sizes, username, password, auth), auth)
+        for (method, path), plan in found:
+            if warmup:
+                await drive(app, method, plan, warmup, min(concurrency, warmup), counter, seed)
+            results[f"{method} {path}"] = await drive(app, method, plan, requests, concurrency, counter, seed)
+    return results, skipped
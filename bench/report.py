@@ -0,0 +1,87 @@
+import json
+import os
+import subprocess
+import time
+
+BASELINE_DIR = os.path.join(os.path.dirname(__file__), "baselines")
+REGRESSION_THRESHOLD = 0.10
+
+def _percentile(ordered, q: float):
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, round(q * len(ordered)) - 1))]
+
+def summarize(results: dict):
+    summary = {}
+    for endpoint, sample in results.items():
+        ordered = sorted(sample["latencies"])
+        count = len(ordered)
+        summary[endpoint] = {
+            "requests": count,
+            # Anything outside 2xx/3xx, so 401 or 422 fast paths are not
+            # mistaken for successful requests.
+            "errors": sum(n for status, n in sample["statuses"].items() if not 200 <= status < 400),
+            "statuses": {str(k): v for k, v in sorted(sample["statuses"].items())},
+            "p50_ms": round(_percentile(ordered, 0.50) * 1000, 3),
+            "p95_ms": round(_percentile(ordered, 0.95) * 1000, 3),
+            "p99_ms": round(_percentile(ordered, 0.99) * 1000, 3),
+            "rps": round(count / sample["elapsed"], 1) if sample["elapsed"] else 0.0,
+            "queries_per_request": round(sample["queries"] / count, 2) if count else 0.0,
+        }
+    return summary
+
+def _commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def save_baseline(name: str, summary: dict, meta: dict):
+    os.makedirs(BASELINE_DIR, exist_ok=True)
+    path = os.path.join(BASELINE_DIR, f"{name}.json")
+    with open(path, "w") as f:
+        json.dump({"commit": _commit(), "created": time.strftime("%Y-%m-%dT%H:%M:%S"), **meta, "endpoints": summary}, f, indent=2, sort_keys=True)
+    return path
+
+def load_baseline(name: str):
+    with open(os.path.join(BASELINE_DIR, f"{name}.json")) as f:
+        return json.load(f)
+
+def compare(summary: dict, baseline: dict):
+    # Per endpoint: relative change in p95 and throughput, and absolute
+    # change in queries per request. Slower p95, lower throughput or more
+    # queries beyond the threshold count as regressions.
+    rows = {}
+    for endpoint, current in summary.items():
+        before = baseline["endpoints"].get(endpoint)
+        if before is None:
+            continue
+        p95 = (current["p95_ms"] - before["p95_ms"]) / before["p95_ms"] if before["p95_ms"] else 0.0
+        rps = (current["rps"] - before["rps"]) / before["rps"] if before["rps"] else 0.0
+        queries = current["queries_per_request"] - before["queries_per_request"]
+        rows[endpoint] = {
+            "p95_change": round(p95, 4),
+            "rps_change": round(rps, 4),
+            "queries_change": round(queries, 2),
+            "regression": p95 > REGRESSION_THRESHOLD or rps < -REGRESSION_THRESHOLD or queries > 0,
+        }
+    return rows
+
+def render(summary: dict, comparison: dict | None = None):
+    header = f"{'endpoint':<44}{'req':>7}{'err':>5}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'rps':>10}{'q/req':>7}"
+    if comparison is not None:
+        header += f"{'Δp95':>9}{'Δrps':>9}{'Δq':>6}"
+    lines = [header, "-" * len(header)]
+    for endpoint, s in sorted(summary.items()):
+        line = (
+            f"{endpoint:<44}{s['requests']:>7}{s['errors']:>5}{s['p50_ms']:>10.2f}"
+            f"{s['p95_ms']:>10.2f}{s['p99_ms']:>10.2f}{s['rps']:>10.1f}{s['queries_per_request']:>7.2f}"
+        )
+        c = (comparison or {}).get(endpoint)
+        if c:
+            line += f"{c['p95_change']:>+9.1%}{c['rps_change']:>+9.1%}{c['queries_change']:>+6.1f}"
+            line += "  REGRESSION" if c["regression"] else ""
+        lines.append(line)
+    return "\n".join(lines)
@@ -0,0 +1,21 @@
+import os
+import shutil
+import tempfile
+
+# app.database reads DATABASE_URL at import, so this runs before any app
+# module is imported.
+_tmp = tempfile.mkdtemp(prefix="mark2-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp, 'test.db')}"
+
+import pytest
+from app.database import engine
+from app.migrations import upgrade
+from app.counters import install_counters
+
+@pytest.fixture(scope="session", autouse=True)
+def schema():
+    upgrade(engine)
+    install_counters(engine)
+    yield
+    engine.dispose()
+    shutil.rmtree(_tmp, ignore_errors=True)
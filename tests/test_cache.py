@@ -0,0 +1,60 @@
+import asyncio
+from sqlalchemy import insert, update
+from app import cache
+from app.cache import cached
+from app.database import AsyncSessionLocal, engine
+from app.models import Document
+
+def _document():
+    with engine.begin() as conn:
+        return conn.execute(insert(Document).values(title="cache").returning(Document.id)).scalar()
+
+def test_result_is_cached():
+    calls = []
+
+    @cached(ttl=60, tables=("documents",))
+    async def quiet(db, marker):
+        calls.append(marker)
+        return marker
+
+    assert asyncio.run(quiet(None, "a")) == "a"
+    assert asyncio.run(quiet(None, "a")) == "a"
+    assert calls == ["a"]
+
+def test_read_overlapping_a_commit_is_not_cached():
+    doc_id = _document()
+
+    @cached(ttl=60, tables=("documents",))
+    async def racing(db, marker):
+        async with AsyncSessionLocal() as session:
+            await session.execute(update(Document).where(Document.id == doc_id).values(title=marker))
+            await session.commit()
+        return marker
+
+    assert asyncio.run(racing(None, "b")) == "b"
+    assert cache.cache.get(("racing", ("b",), ())) is None
+
+def test_sync_read_overlapping_a_commit_is_not_cached():
+    doc_id = _document()
+
+    @cached(ttl=60, tables=("documents",))
+    def racing_sync(db, marker):
+        with engine.begin() as conn:
+            conn.execute(update(Document).where(Document.id == doc_id).values(title=marker))
+        return marker
+
+    assert racing_sync(None, "c") == "c"
+    assert cache.cache.get(("racing_sync", ("c",), ())) is None
+
+def test_commit_invalidates():
+    doc_id = _document()
+
+    @cached(ttl=60, tables=("documents",))
+    def value(db):
+        return object()
+
+    first = value(None)
+    assert value(None) is first
+    with engine.begin() as conn:
+        conn.execute(update(Document).where(Document.id == doc_id).values(title="changed"))
+    assert value(None) is not first
@@ -0,0 +1,34 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import insert, select
+from app.database import ReadSessionLocal, engine
+from app.models import Document
+from app.pagination import decode_cursor, encode_cursor, fetch_page
+
+def test_cursor_round_trip():
+    for last_id in (0, 1, 2**31, 2**53):
+        assert decode_cursor(encode_cursor(last_id)) == last_id
+
+@pytest.mark.parametrize("cursor", ["", "!!", encode_cursor("x"), "W10"])
+def test_invalid_cursor(cursor):
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor(cursor)
+    assert exc.value.status_code == 400
+
+def test_pages_cover_every_row_once():
+    with engine.begin() as conn:
+        conn.execute(insert(Document), [{"title": f"page{i}"} for i in range(25)])
+        expected = list(conn.execute(select(Document.id).order_by(Document.id)).scalars())
+
+    async def walk():
+        seen, cursor = [], None
+        async with ReadSessionLocal() as db:
+            while True:
+                page = await fetch_page(db, Document, [Document.id], [], cursor, 7)
+                seen += [item["id"] for item in page["items"]]
+                cursor = page["next_cursor"]
+                if cursor is None:
+                    return seen
+
+    assert asyncio.run(walk()) == expected
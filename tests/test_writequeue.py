@@ -0,0 +1,61 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import insert
+from app.database import engine
+from app.models import Document
+from app.routes.documents import apply_document_updates
+from app.schemas import DocumentUpdate
+from app.writequeue import WriteQueue
+
+def _documents(count):
+    with engine.begin() as conn:
+        return list(conn.execute(insert(Document).returning(Document.id), [{"title": "queued"}] * count).scalars())
+
+def test_per_item_errors():
+    doc_id, other_id = _documents(2)
+
+    async def go():
+        queue = WriteQueue(apply_document_updates, max_delay=0.05)
+        results = await asyncio.gather(
+            queue.submit((doc_id, DocumentUpdate(verified=True), None)),
+            queue.submit((10_000_000, DocumentUpdate(verified=True), None)),
+            queue.submit((other_id, DocumentUpdate(verified=True), 99)),
+            return_exceptions=True,
+        )
+        await queue.drain()
+        return queue, results
+
+    queue, (ok, missing, stale) = asyncio.run(go())
+    assert ok == 2
+    assert isinstance(missing, HTTPException) and missing.status_code == 404
+    assert isinstance(stale, HTTPException) and stale.status_code == 412
+    assert queue.batches == 1 and queue.items == 3
+
+def test_drain_commits_queued_writes():
+    ids = _documents(5)
+
+    async def go():
+        queue = WriteQueue(apply_document_updates, max_delay=0.5)
+        pending = [asyncio.create_task(queue.submit((i, DocumentUpdate(verified=True), None))) for i in ids]
+        await asyncio.sleep(0.01)
+        await queue.drain()
+        assert queue.stats() == {"batches": 1, "items": 5, "pending": 0}
+        results = await asyncio.gather(*pending)
+        # After drain, submissions commit on their own.
+        results.append(await queue.submit((ids[0], DocumentUpdate(verified=False), None)))
+        return queue, results
+
+    queue, results = asyncio.run(go())
+    assert results == [2] * 5 + [3]
+    assert queue.batches == 1
+
+def test_unknown_document_outside_queue():
+    async def go():
+        queue = WriteQueue(apply_document_updates)
+        await queue.drain()
+        return await queue.submit((10_000_000, DocumentUpdate(verified=True), None))
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(go())
+    assert exc.value.status_code == 404